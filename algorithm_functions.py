@@ -1,10 +1,51 @@
-from random import choice
+from math import exp
+from random import choice, choices
+from time import perf_counter
+from typing import Callable, NamedTuple
 
-from game_functions import evaluate_board_state, get_ordered_moves, has_moves_left
+from bitboard_functions import board_to_bitboard, get_bitboard_layout, minimax_plain_bitboard, minimax_search_bitboard
+from game_functions import (DEFAULT_WIN_LENGTH, get_board_size, get_candidate_moves, get_evaluation_tables,
+                            promote_move, SearchAborted)
+from game_state import GameState
+from move_ordering import MoveOrderer
+from search_stats import SearchStats
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+
+class SkillLevel(NamedTuple):
+    """
+        How a difficulty level searches and how it errs.
+
+            `node_budget` caps the nodes of an iterative deepening search (None: the full-width
+            search of `compute_best_move`). `temperature` is the error model: moves are drawn with
+            probability proportional to exp(score / (temperature × win score)), so near-best moves
+            are likely, clearly worse ones rare and a forced win is almost never missed. A
+            temperature of 0 always plays the best move.
+    """
+    node_budget: int | None
+    temperature: float
+
+
+# Difficulty → skill level. Levels without an entry play at full strength.
+SKILL_LEVELS = {
+    1: SkillLevel(node_budget=25, temperature=0.25),
+    2: SkillLevel(node_budget=50, temperature=0.15),
+    3: SkillLevel(node_budget=100, temperature=0.08),
+    4: SkillLevel(node_budget=200, temperature=0.04),
+}
+FULL_STRENGTH = SkillLevel(node_budget=None, temperature=0.0)
+# The budgets are for boards of at least this many cells. Smaller boards get a proportional share: on 3×3 the
+# full-width search at the easy depths costs only ~10-110 nodes, and iterative deepening up to a full budget
+# would cost more than that search.
+BUDGET_REFERENCE_CELLS = 25
 
 
 def minimax_search(board_state: list[str], current_depth: int, is_maximizing: bool,
-                   alpha: float, beta: float, depth_limit: int) -> int:
+                   alpha: float, beta: float, depth_limit: int,
+                   transposition_table: TranspositionTable | None = None,
+                   win_length: int = DEFAULT_WIN_LENGTH,
+                   should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None,
+                   batch_ordering: bool = False, move_orderer: MoveOrderer | None = None) -> int:
     """
         Perform a Minimax search with alpha-beta pruning from the current board state to compute the best
         achievable score for the current player.
@@ -14,7 +55,9 @@ def minimax_search(board_state: list[str], current_depth: int, is_maximizing: bo
             It uses alpha-beta pruning to eliminate branches that cannot improve the outcome
             (based on the current `alpha` and `beta` bounds), which optimizes the search.
             For each possible move, the function temporarily applies that move to `board_state`,
-            recursively evaluates the result, and then backtracks (undoes the move).
+            recursively evaluates the result, and then backtracks (undoes the move). The board is
+            wrapped in a `GameState`, which updates the evaluation terms incrementally on every move
+            and undo instead of rescanning all lines at each node.
 
             Args:
                 board_state (list[str]): The current game board as a list of strings
@@ -33,6 +76,26 @@ def minimax_search(board_state: list[str], current_depth: int, is_maximizing: bo
                 depth_limit (int): The maximum depth to explore in the game tree. If `current_depth`
                 equals this limit, the search will stop and return the heuristic evaluation of the board
                 at that point.
+                transposition_table (TranspositionTable | None): Optional cache of previously searched
+                positions. Entries are keyed on the symmetry-reduced board, so positions reached
+                through different move orders or rotations/reflections are only searched once.
+                Scores outside the (`alpha`, `beta`) window are stored as lower/upper bounds.
+                The best move stored for a position is searched first when it is revisited.
+                win_length (int): The number of marks in a row needed to win. The board size is
+                taken from the length of `board_state`.
+                should_stop (Callable[[], bool] | None): Optional callback checked at every node.
+                When it returns True the search raises `SearchAborted`; `board_state` is then left
+                with the moves that were being explored, so callers should search on a copy.
+                stats (SearchStats | None): Optional statistics; every visited node is passed to
+                `stats.enter_node` and every pruned node to `stats.record_cutoff`.
+                batch_ordering (bool): If True, score all children of a node in one NumPy call
+                (see `batch_evaluation.py`) to order them. The order, and therefore the search, is
+                unchanged. On the supported boards the incremental `GameState` ordering is still
+                faster per node, so this is off by default.
+                move_orderer (MoveOrderer | None): Optional dynamic move ordering (hash move,
+                killer moves, history heuristic) used instead of the static evaluation-based
+                ordering. The orderer learns from every cutoff, so reuse it across related
+                searches. Scores are the same either way; only the number of nodes changes.
 
             Returns:
                 int: The evaluated score of the board from X's perspective, assuming optimal play
@@ -42,38 +105,15 @@ def minimax_search(board_state: list[str], current_depth: int, is_maximizing: bo
                 (win, loss, or draw) or reaching the depth limit will cause the function to return
                 the board's static evaluation immediately.
     """
-    score = evaluate_board_state(board_state)
-    if score == 100 or score == -100 or current_depth == depth_limit or not has_moves_left(board_state):
-        return score
-
-    if is_maximizing:
-        best_score = float("-inf")
-        for index in get_ordered_moves(board_state, "X"):
-            board_state[index] = "X"
-            value = minimax_search(board_state, current_depth + 1, False, alpha, beta, depth_limit)
-            board_state[index] = "-"
-            best_score = max(best_score, value)
-            alpha = max(alpha, best_score)
-            if alpha >= beta:
-                break
-
-        return best_score
-    else:
-        best_score = float("inf")
-        for index in get_ordered_moves(board_state, "O"):
-            board_state[index] = "O"
-            value = minimax_search(board_state, current_depth + 1, True, alpha, beta, depth_limit)
-            board_state[index] = "-"
-            best_score = min(best_score, value)
-            beta = min(beta, best_score)
-            if alpha >= beta:
-                break
-
-        return best_score
+    state = GameState(board_state, win_length, batch_ordering)
+    return _minimax_search_state(state, current_depth, is_maximizing, alpha, beta, depth_limit, transposition_table,
+                                 should_stop, stats, move_orderer)
 
 
 def minimax_plain(board_state: list[str], current_depth: int, is_maximizing: bool,
-                  depth_limit: int) -> int:
+                  depth_limit: int, transposition_table: TranspositionTable | None = None,
+                  win_length: int = DEFAULT_WIN_LENGTH, should_stop: Callable[[], bool] | None = None,
+                  stats: SearchStats | None = None) -> int:
     """
         Perform a Minimax search without alpha-beta pruning from the current board state to compute
         the best achievable score.
@@ -83,7 +123,7 @@ def minimax_plain(board_state: list[str], current_depth: int, is_maximizing: boo
             representing the outcome from X's perspective. The search will consider every possible
             move sequence up to the depth limit. For each move, the function modifies `board_state`
             by placing a move, calls itself recursively to evaluate the outcome, and then backtracks
-            by removing the move.
+            by removing the move. As in `minimax_search`, moves are made and unmade on a `GameState`.
 
             Args:
                 board_state (list[str]): The current game board as a list of strings
@@ -98,6 +138,13 @@ def minimax_plain(board_state: list[str], current_depth: int, is_maximizing: boo
                 depth_limit (int): The maximum depth to search in the game tree. When `current_depth`
                 equals this limit, the function returns the static evaluation of the board without
                 exploring further moves.
+                transposition_table (TranspositionTable | None): Optional cache of previously searched
+                positions keyed on the symmetry-reduced board. Plain Minimax always computes exact
+                scores, so every stored entry is `EXACT`.
+                win_length (int): The number of marks in a row needed to win.
+                should_stop (Callable[[], bool] | None): Optional callback checked at every node, as
+                in `minimax_search`.
+                stats (SearchStats | None): Optional statistics, as in `minimax_search`.
 
             Returns:
                 int: The best possible score from the given board state, from X's perspective.
@@ -106,30 +153,144 @@ def minimax_plain(board_state: list[str], current_depth: int, is_maximizing: boo
                 play for both players and the function returns immediately if a terminal state is
                 reached or the depth limit is met.
     """
-    score = evaluate_board_state(board_state)
-    if score == 100 or score == -100 or current_depth == depth_limit or not has_moves_left(board_state):
+    return _minimax_plain_state(GameState(board_state, win_length), current_depth, is_maximizing, depth_limit,
+                                transposition_table, should_stop, stats)
+
+
+def _minimax_search_state(state: GameState, current_depth: int, is_maximizing: bool, alpha: float, beta: float,
+                          depth_limit: int, transposition_table: TranspositionTable | None,
+                          should_stop: Callable[[], bool] | None, stats: SearchStats | None,
+                          move_orderer: MoveOrderer | None = None):
+    # `minimax_search` on an incrementally evaluated state; moves are made and unmade on `state`
+    if should_stop is not None and should_stop():
+        raise SearchAborted
+    if stats is not None:
+        stats.enter_node(current_depth, state.board)
+
+    score = state.evaluate()
+    if (score == state.win_score or score == -state.win_score or current_depth == depth_limit
+            or not state.empty_count):
+        return score
+
+    table_key = permutation = None
+    hash_move = -1
+    original_alpha, original_beta = alpha, beta
+    if transposition_table is not None:
+        table_key, permutation = transposition_table.make_state_key(state, is_maximizing, depth_limit - current_depth)
+        entry = transposition_table.probe(table_key)
+        if entry is not None:
+            flag, value, stored_move = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+            hash_move = permutation[stored_move]
+
+    if stats is not None:
+        stats.expanded_nodes += 1
+    best_index = -1
+    player = "X" if is_maximizing else "O"
+    if move_orderer is None:
+        moves = promote_move(state.ordered_moves(player), hash_move)
+    else:
+        moves = move_orderer.order_moves(state, player, current_depth, hash_move)
+
+    if is_maximizing:
+        best_score = float("-inf")
+        for index in moves:
+            state.make_move(index, "X")
+            value = _minimax_search_state(state, current_depth + 1, False, alpha, beta, depth_limit,
+                                          transposition_table, should_stop, stats, move_orderer)
+            state.unmake_move(index)
+            if value > best_score:
+                best_score, best_index = value, index
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.record_cutoff(current_depth)
+                if move_orderer is not None:
+                    move_orderer.record_cutoff(player, index, current_depth, depth_limit - current_depth)
+                break
+    else:
+        best_score = float("inf")
+        for index in moves:
+            state.make_move(index, "O")
+            value = _minimax_search_state(state, current_depth + 1, True, alpha, beta, depth_limit,
+                                          transposition_table, should_stop, stats, move_orderer)
+            state.unmake_move(index)
+            if value < best_score:
+                best_score, best_index = value, index
+            beta = min(beta, best_score)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.record_cutoff(current_depth)
+                if move_orderer is not None:
+                    move_orderer.record_cutoff(player, index, current_depth, depth_limit - current_depth)
+                break
+
+    if transposition_table is not None:
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= original_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        transposition_table.store(table_key, flag, best_score, permutation.index(best_index))
+
+    return best_score
+
+
+def _minimax_plain_state(state: GameState, current_depth: int, is_maximizing: bool, depth_limit: int,
+                         transposition_table: TranspositionTable | None,
+                         should_stop: Callable[[], bool] | None, stats: SearchStats | None):
+    # `minimax_plain` on an incrementally evaluated state
+    if should_stop is not None and should_stop():
+        raise SearchAborted
+    if stats is not None:
+        stats.enter_node(current_depth, state.board)
+
+    score = state.evaluate()
+    if (score == state.win_score or score == -state.win_score or current_depth == depth_limit
+            or not state.empty_count):
         return score
 
+    table_key = permutation = None
+    if transposition_table is not None:
+        table_key, permutation = transposition_table.make_state_key(state, is_maximizing, depth_limit - current_depth)
+        entry = transposition_table.probe(table_key)
+        if entry is not None and entry[0] == EXACT:
+            return entry[1]
+
+    if stats is not None:
+        stats.expanded_nodes += 1
+    best_index = -1
     if is_maximizing:
         best_score = float("-inf")
-        for index in range(len(board_state)):
-            if board_state[index] == "-":
-                board_state[index] = "X"
-                value = minimax_plain(board_state, current_depth + 1, False, depth_limit)
-                board_state[index] = "-"
-                best_score = max(best_score, value)
-
-        return best_score
+        for index in get_candidate_moves(state.board):
+            state.make_move(index, "X")
+            value = _minimax_plain_state(state, current_depth + 1, False, depth_limit, transposition_table,
+                                         should_stop, stats)
+            state.unmake_move(index)
+            if value > best_score:
+                best_score, best_index = value, index
     else:
         best_score = float("inf")
-        for index in range(len(board_state)):
-            if board_state[index] == "-":
-                board_state[index] = "O"
-                value = minimax_plain(board_state, current_depth + 1, True, depth_limit)
-                board_state[index] = "-"
-                best_score = min(best_score, value)
+        for index in get_candidate_moves(state.board):
+            state.make_move(index, "O")
+            value = _minimax_plain_state(state, current_depth + 1, True, depth_limit, transposition_table,
+                                         should_stop, stats)
+            state.unmake_move(index)
+            if value < best_score:
+                best_score, best_index = value, index
 
-        return best_score
+    if transposition_table is not None:
+        transposition_table.store(table_key, EXACT, best_score, permutation.index(best_index))
+
+    return best_score
 
 
 def choose_move_with_noise(candidates: list[tuple[int, int]], player_symbol: str, difficulty: int) -> int:
@@ -178,7 +339,87 @@ def choose_move_with_noise(candidates: list[tuple[int, int]], player_symbol: str
     return pool[0]
 
 
-def compute_best_move(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int) -> int:
+def compute_move_candidates(board_state: list[str], player_symbol: str, depth_limit: int,
+                            use_pruning: bool = True, transposition_table: TranspositionTable | None = None,
+                            use_bitboard: bool = False, win_length: int = DEFAULT_WIN_LENGTH,
+                            should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None,
+                            batch_ordering: bool = False,
+                            move_orderer: MoveOrderer | None = None) -> list[tuple[int, float]]:
+    """
+        Score every legal move for the given player with a full-window search of the resulting position.
+
+        This is the root loop shared by `compute_best_move` and `compute_best_move_plain`. Each
+        candidate cell (every empty cell on the classic board, see `get_candidate_moves`) is tried
+        in index order and scored from X's perspective, which produces the `(index, score)` list
+        that `choose_move_with_noise` selects from.
+
+        Args:
+            board_state (list[str]): The current board state as a list of strings
+            (with "X" for player X, "O" for player O, and "-" for empty spaces).
+            player_symbol (str): The symbol of the player whose turn it is ("X" or "O").
+            depth_limit (int): The maximum search depth below each root move.
+            use_pruning (bool): True to score moves with `minimax_search` (alpha-beta pruning),
+            False to use `minimax_plain`. Both produce the same scores.
+            transposition_table (TranspositionTable | None): Optional position cache shared by all
+            root moves.
+            use_bitboard (bool): If True, run the search on the bitmask engine in
+            `bitboard_functions.py`.
+            win_length (int): The number of marks in a row needed to win. The board size is taken
+            from the length of `board_state`.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback, checked at every
+            node. When it fires, `SearchAborted` is raised and (with the list engine) `board_state`
+            keeps the moves being explored, so cancellable searches should run on a copy.
+            stats (SearchStats | None): Optional statistics. The nodes and cutoffs of every root
+            move's search are accumulated; the elapsed time is added and the returned candidates
+            are recorded.
+            batch_ordering (bool): If True, the list engine orders moves with the NumPy batch
+            evaluator, as in `minimax_search`.
+            move_orderer (MoveOrderer | None): Optional dynamic move ordering for the list engine's
+            alpha-beta search, shared by all root moves; see `minimax_search`.
+
+        Returns:
+            list[tuple[int, float]]: `(index, score)` pairs for every candidate cell, in index order.
+    """
+    started = perf_counter()
+    candidates = []
+    alpha = float("-inf")
+    beta  = float("inf")
+    x_bits, o_bits = board_to_bitboard(board_state) if use_bitboard else (0, 0)
+    layout = get_bitboard_layout(get_board_size(board_state), win_length) if use_bitboard else None
+    state = None if use_bitboard else GameState(board_state, win_length, batch_ordering)
+    next_is_max = (player_symbol == "O")    # human turn next if AI just played
+
+    for i in get_candidate_moves(board_state):
+        if use_bitboard:
+            child_x, child_o = (x_bits | 1 << i, o_bits) if player_symbol == "X" else (x_bits, o_bits | 1 << i)
+            if use_pruning:
+                value = minimax_search_bitboard(child_x, child_o, 0, next_is_max, alpha, beta, depth_limit,
+                                                transposition_table, layout, should_stop, stats)
+            else:
+                value = minimax_plain_bitboard(child_x, child_o, 0, next_is_max, depth_limit,
+                                               transposition_table, layout, should_stop, stats)
+            candidates.append((i, value))
+            continue
+        state.make_move(i, player_symbol)
+        if use_pruning:
+            value = _minimax_search_state(state, 0, next_is_max, alpha, beta, depth_limit, transposition_table,
+                                          should_stop, stats, move_orderer)
+        else:
+            value = _minimax_plain_state(state, 0, next_is_max, depth_limit, transposition_table, should_stop, stats)
+        state.unmake_move(i)
+        candidates.append((i, value))
+
+    if stats is not None:
+        stats.elapsed_seconds += perf_counter() - started
+        stats.candidates = candidates
+    return candidates
+
+
+def compute_best_move(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                      transposition_table: TranspositionTable | None = None, use_bitboard: bool = False,
+                      win_length: int = DEFAULT_WIN_LENGTH, should_stop: Callable[[], bool] | None = None,
+                      stats: SearchStats | None = None, batch_ordering: bool = False,
+                      move_orderer: MoveOrderer | None = None) -> int:
     """
         Compute the best move index for the given player using a Minimax search with alpha-beta pruning.
 
@@ -203,6 +444,24 @@ def compute_best_move(board_state: list[str], player_symbol: str, depth_limit: i
             (to simulate human-like mistakes), while a difficulty of 9 will always choose
             the optimal move. This is achieved by possibly selecting a near-optimal move
             at random when difficulty is below 5.
+            transposition_table (TranspositionTable | None): Optional position cache shared by all
+            root moves. Passing the same table on every turn of a game lets later moves reuse the
+            positions already searched on earlier ones.
+            use_bitboard (bool): If True, run the search on the bitmask engine in
+            `bitboard_functions.py`. The scores, and therefore the chosen move, are identical;
+            only the speed differs.
+            win_length (int): The number of marks in a row needed to win (3 on the classic board).
+            The board size is taken from the length of `board_state`.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback; see
+            `compute_move_candidates`.
+            stats (SearchStats | None): Optional statistics object that is filled in alongside the
+            returned move: nodes, depth reached, cutoffs by ply, branching factor, elapsed time,
+            the candidate scores fed into `choose_move_with_noise` and the chosen move. Its
+            `profile_hook` is called on every node of the search.
+            batch_ordering (bool): If True, order moves with the NumPy batch evaluator; see
+            `minimax_search`.
+            move_orderer (MoveOrderer | None): Optional dynamic move ordering (killer moves and
+            history heuristic) instead of the static ordering; see `minimax_search`.
 
         Returns:
             int: The index (0-based) of the chosen move on the board for the given player.
@@ -210,23 +469,19 @@ def compute_best_move(board_state: list[str], player_symbol: str, depth_limit: i
             assumes there is at least one empty cell in `board_state` when called
             (i.e., it should not be invoked on a full board).
     """
-    candidates = []
-    alpha = float("-inf")
-    beta  = float("inf")
-
-    for i in range(len(board_state)):
-        if board_state[i] != "-":
-            continue
-        board_state[i] = player_symbol
-        next_is_max = (player_symbol == "O")    # human turn next if AI just played
-        value = minimax_search(board_state, 0, next_is_max, alpha, beta, depth_limit)
-        board_state[i] = "-"
-        candidates.append((i, value))
-
-    return choose_move_with_noise(candidates, player_symbol, difficulty)
-
-
-def compute_best_move_plain(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int) -> int:
+    candidates = compute_move_candidates(board_state, player_symbol, depth_limit, True,
+                                         transposition_table, use_bitboard, win_length, should_stop, stats,
+                                         batch_ordering, move_orderer)
+    move = choose_move_with_noise(candidates, player_symbol, difficulty)
+    if stats is not None:
+        stats.chosen_move = move
+    return move
+
+
+def compute_best_move_plain(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                            transposition_table: TranspositionTable | None = None,
+                            use_bitboard: bool = False, win_length: int = DEFAULT_WIN_LENGTH,
+                            should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None) -> int:
     """
         Compute the best move index for the given player using a plain Minimax search
         (no alpha-beta pruning).
@@ -248,20 +503,258 @@ def compute_best_move_plain(board_state: list[str], player_symbol: str, depth_li
             difficulty (int): The difficulty level (1-9) controlling the randomness of move s
             election. As with `compute_best_move`, lower difficulty values can cause a near-optimal
             move to be chosen instead of the absolute best move, to simulate imperfect play.
+            transposition_table (TranspositionTable | None): Optional position cache, as in
+            `compute_best_move`.
+            use_bitboard (bool): If True, run the search on the bitmask engine, as in
+            `compute_best_move`.
+            win_length (int): The number of marks in a row needed to win, as in `compute_best_move`.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback, as in
+            `compute_best_move`.
+            stats (SearchStats | None): Optional search statistics, as in `compute_best_move`.
 
         Returns:
             int: The index of the chosen move (0-based) that the player should make. This value
             corresponds to a position in `board_state` that is currently empty. It is assumed
             that at least one empty cell is available on the board when this function is called.
     """
-    candidates = []
-    for i in range(len(board_state)):
-        if board_state[i] != "-":
-            continue
-        board_state[i] = player_symbol
-        next_is_max = (player_symbol == "O")
-        value = minimax_plain(board_state, 0, next_is_max, depth_limit)
-        board_state[i] = "-"
-        candidates.append((i, value))
+    candidates = compute_move_candidates(board_state, player_symbol, depth_limit, False,
+                                         transposition_table, use_bitboard, win_length, should_stop, stats)
+    move = choose_move_with_noise(candidates, player_symbol, difficulty)
+    if stats is not None:
+        stats.chosen_move = move
+    return move
+
+
+def compute_best_move_timed(board_state: list[str], player_symbol: str, time_budget_ms: float, difficulty: int,
+                            transposition_table: TranspositionTable | None = None, use_bitboard: bool = False,
+                            win_length: int = DEFAULT_WIN_LENGTH, max_depth: int | None = None,
+                            should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None,
+                            move_orderer: MoveOrderer | None = None) -> int:
+    """
+        Compute a move with iterative deepening under a wall-clock budget (anytime search).
+
+        The root moves are scored with `minimax_search` at depth limit 0, then 1, 2 and so on.
+        All iterations share one transposition table, so each iteration starts from the best
+        moves (the principal variation) found by the previous one. Root moves are also re-ordered
+        by their previous scores. When the budget runs out the unfinished iteration is discarded
+        and the candidates of the deepest completed one go through `choose_move_with_noise`.
+        Deepening also stops early once it can no longer change the result: every root move is
+        decided, `max_depth` is reached, or the depth limit covers the rest of the game.
+
+        Args:
+            board_state (list[str]): The current board state. It is not modified.
+            player_symbol (str): The symbol of the player whose turn it is ("X" or "O").
+            time_budget_ms (float): The wall-clock budget in milliseconds. The depth 0 iteration
+            always completes, so a move is returned even with a budget of 0.
+            difficulty (int): The difficulty level (1-9) passed on to `choose_move_with_noise`.
+            transposition_table (TranspositionTable | None): Optional position cache. A fresh
+            table is used if none is given.
+            use_bitboard (bool): If True, search with the bitmask engine.
+            win_length (int): The number of marks in a row needed to win.
+            max_depth (int | None): Optional cap on the depth limit, e.g. the difficulty's
+            look-ahead.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback. Unlike the
+            budget, cancellation discards everything and raises `SearchAborted`.
+            stats (SearchStats | None): Optional search statistics, as in `compute_best_move`.
+            Nodes of every iteration are counted, including the one cut short by the budget;
+            `completed_depth` is the depth limit of the deepest completed iteration.
+            move_orderer (MoveOrderer | None): Optional dynamic move ordering for the list engine,
+            shared by all iterations so killers and history carry over to the deeper searches.
+
+        Returns:
+            int: The index of the chosen move.
+    """
+    started = perf_counter()
+    deadline = started + time_budget_ms / 1000
+    if transposition_table is None:
+        transposition_table = TranspositionTable()
+
+    def out_of_time():
+        return perf_counter() >= deadline or (should_stop is not None and should_stop())
+
+    completed, completed_depth = _deepen_root_search(board_state, player_symbol, max_depth, out_of_time,
+                                                     transposition_table, use_bitboard, win_length, should_stop,
+                                                     stats, move_orderer)
+    move = choose_move_with_noise(completed, player_symbol, difficulty)
+    if stats is not None:
+        stats.elapsed_seconds += perf_counter() - started
+        stats.completed_depth = completed_depth
+        stats.candidates = completed
+        stats.chosen_move = move
+    return move
+
+
+def _deepen_root_search(board_state: list[str], player_symbol: str, max_depth: int | None,
+                        budget_exhausted: Callable[[], bool], transposition_table: TranspositionTable,
+                        use_bitboard: bool, win_length: int, should_stop: Callable[[], bool] | None,
+                        stats: SearchStats | None, move_orderer: MoveOrderer | None) -> tuple[list, int]:
+    # The iterative deepening loop of `compute_best_move_timed`. `budget_exhausted` is checked at every
+    # node after the depth 0 iteration; it discards the unfinished iteration, while `should_stop` aborts.
+    # Returns the candidates of the deepest completed iteration and its depth limit.
+    empty_cells = board_state.count("-")
+    deepest = empty_cells - 1 if max_depth is None else min(max_depth, empty_cells - 1)
+    win_score = get_evaluation_tables(len(board_state), win_length)[0]
+    next_is_max = (player_symbol == "O")
+    x_bits, o_bits = board_to_bitboard(board_state) if use_bitboard else (0, 0)
+    layout = get_bitboard_layout(get_board_size(board_state), win_length) if use_bitboard else None
+
+    root_moves = get_candidate_moves(board_state)
+    completed = None
+    completed_depth = -1
+    for depth_limit in range(max(deepest, 0) + 1):
+        stop = budget_exhausted if depth_limit > 0 else should_stop
+        state = GameState(list(board_state), win_length)    # An aborted search leaves its moves on the board
+        scores = {}
+        try:
+            for i in root_moves:
+                if use_bitboard:
+                    child_x, child_o = (x_bits | 1 << i, o_bits) if player_symbol == "X" else (x_bits, o_bits | 1 << i)
+                    scores[i] = minimax_search_bitboard(child_x, child_o, 0, next_is_max, float("-inf"), float("inf"),
+                                                        depth_limit, transposition_table, layout, stop, stats)
+                else:
+                    state.make_move(i, player_symbol)
+                    scores[i] = _minimax_search_state(state, 0, next_is_max, float("-inf"), float("inf"),
+                                                      depth_limit, transposition_table, stop, stats, move_orderer)
+                    state.unmake_move(i)
+        except SearchAborted:
+            if depth_limit == 0 or (should_stop is not None and should_stop()):
+                raise
+            break
+
+        completed = sorted(scores.items())
+        completed_depth = depth_limit
+        if all(score == win_score or score == -win_score for score in scores.values()):
+            break
+        # Search the most promising root moves first in the next iteration
+        root_moves = sorted(root_moves, key=scores.get, reverse=(player_symbol == "X"))
+
+    return completed, completed_depth
+
+
+def get_skill_level(difficulty: int) -> SkillLevel:
+    return SKILL_LEVELS.get(difficulty, FULL_STRENGTH)
+
+
+def choose_move_with_temperature(candidates: list[tuple[int, float]], player_symbol: str, temperature: float,
+                                 win_score: float) -> int:
+    """
+        Draw a move from scored candidates with a softmax error model.
+
+            Each move is weighted by exp(-loss / (temperature × win_score)), where the loss is how
+            much worse its score is than the best one for `player_symbol`. With a temperature of 0
+            the best move is returned, as `choose_move_with_noise` does from difficulty 5.
+
+            Returns:
+                int: The index of the chosen move.
+    """
+    if temperature <= 0:
+        return choose_move_with_noise(candidates, player_symbol, 9)
+    sign = 1 if player_symbol == "X" else -1
+    best = max(sign * score for _, score in candidates)
+    weights = [exp((sign * score - best) / (temperature * win_score)) for _, score in candidates]
+    return choices([i for i, _ in candidates], weights)[0]
 
-    return choose_move_with_noise(candidates, player_symbol, difficulty)
\ No newline at end of file
+
+def get_node_budget(node_budget: int, cells: int) -> int:
+    return max(node_budget * min(cells, BUDGET_REFERENCE_CELLS) // BUDGET_REFERENCE_CELLS, 1)
+
+
+def _full_width_node_bound(root_moves: int, empty_cells: int, depth_limit: int) -> int:
+    # Most nodes a search of `depth_limit` plies below `root_moves` root moves can visit, pruning aside
+    total = level = root_moves
+    for ply in range(1, min(depth_limit, empty_cells - 1) + 1):
+        level *= empty_cells - ply
+        total += level
+    return total
+
+
+def compute_budgeted_candidates(board_state: list[str], player_symbol: str, depth_limit: int, node_budget: int,
+                                transposition_table: TranspositionTable | None = None, use_bitboard: bool = False,
+                                win_length: int = DEFAULT_WIN_LENGTH, should_stop: Callable[[], bool] | None = None,
+                                stats: SearchStats | None = None,
+                                move_orderer: MoveOrderer | None = None) -> tuple[list[tuple[int, float]], int]:
+    """
+        Score the root moves with iterative deepening until `depth_limit` or until `node_budget`
+        nodes are spent.
+
+            `node_budget` is for boards of `BUDGET_REFERENCE_CELLS` cells or more; smaller boards
+            get the proportional share (`get_node_budget`). When the whole search to `depth_limit`
+            cannot cost more than the budget (late in the game), it is run directly, since deepening
+            towards it would only repeat work. Otherwise the unfinished iteration is discarded. The
+            depth 0 iteration (one node per root move) always completes and is not counted against
+            the budget. A fresh transposition table is used if none is given.
+
+            Returns:
+                tuple: `(candidates, completed_depth)`, the `(index, score)` pairs of the deepest
+                completed iteration and its depth limit: from 0 (only the unbudgeted depth 0
+                iteration finished) up to `depth_limit`, or less than that when every root move was
+                already decided or the board has fewer empty cells.
+    """
+    if transposition_table is None:
+        transposition_table = TranspositionTable()
+    node_budget = get_node_budget(node_budget, len(board_state))
+    empty_cells = board_state.count("-")
+    if _full_width_node_bound(len(get_candidate_moves(board_state)), empty_cells, depth_limit) <= node_budget:
+        candidates = compute_move_candidates(list(board_state), player_symbol, depth_limit, True, transposition_table,
+                                             use_bitboard, win_length, should_stop, stats, move_orderer=move_orderer)
+        return candidates, min(depth_limit, empty_cells - 1)
+    nodes = 0
+
+    def out_of_nodes():
+        nonlocal nodes
+        nodes += 1
+        return nodes > node_budget or (should_stop is not None and should_stop())
+
+    return _deepen_root_search(board_state, player_symbol, depth_limit, out_of_nodes, transposition_table,
+                               use_bitboard, win_length, should_stop, stats, move_orderer)
+
+
+def compute_best_move_budgeted(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                               transposition_table: TranspositionTable | None = None, use_bitboard: bool = False,
+                               win_length: int = DEFAULT_WIN_LENGTH, should_stop: Callable[[], bool] | None = None,
+                               stats: SearchStats | None = None, move_orderer: MoveOrderer | None = None) -> int:
+    """
+        Compute a move for a difficulty level's skill: a node budget and an error model instead of a
+        full-width search followed by random tolerance.
+
+        Levels with a node budget (see `SKILL_LEVELS`) deepen one ply at a time, as
+        `compute_best_move_timed` does, until the budget is spent (`compute_budgeted_candidates`),
+        and the candidates of the deepest completed iteration go through
+        `choose_move_with_temperature`. Easy levels therefore cost a small, fixed number of nodes
+        whatever the board, while their mistakes stay controlled.
+        Levels without a budget are exactly `compute_best_move`.
+
+        Args:
+            board_state (list[str]): The current board state. It is not modified.
+            player_symbol (str): The symbol of the player whose turn it is ("X" or "O").
+            depth_limit (int): The deepest search allowed, as in `compute_best_move`.
+            difficulty (int): The difficulty level (1-9), looked up with `get_skill_level`.
+            transposition_table (TranspositionTable | None): Optional position cache. A fresh
+            table is used if none is given.
+            use_bitboard (bool): If True, search with the bitmask engine.
+            win_length (int): The number of marks in a row needed to win.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback; when it fires,
+            `SearchAborted` is raised.
+            stats (SearchStats | None): Optional search statistics, as in `compute_best_move_timed`.
+            move_orderer (MoveOrderer | None): Optional dynamic move ordering for the list engine.
+
+        Returns:
+            int: The index of the chosen move.
+    """
+    level = get_skill_level(difficulty)
+    if level.node_budget is None:
+        return compute_best_move(board_state, player_symbol, depth_limit, difficulty, transposition_table,
+                                 use_bitboard, win_length, should_stop, stats, move_orderer=move_orderer)
+
+    started = perf_counter()
+    completed, completed_depth = compute_budgeted_candidates(board_state, player_symbol, depth_limit,
+                                                             level.node_budget, transposition_table, use_bitboard,
+                                                             win_length, should_stop, stats, move_orderer)
+    win_score = get_evaluation_tables(len(board_state), win_length)[0]
+    move = choose_move_with_temperature(completed, player_symbol, level.temperature, win_score)
+    if stats is not None:
+        stats.elapsed_seconds += perf_counter() - started
+        stats.completed_depth = completed_depth
+        stats.candidates = completed
+        stats.chosen_move = move
+    return move
@@ -0,0 +1,299 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import count
+from statistics import median
+
+from algorithm_functions import compute_move_candidates
+from game_functions import get_evaluation_tables
+from game_records import GAME_RECORDS_PATH, iter_game_records
+from game_state import GameState
+from transposition_table import TranspositionTable
+
+BLUNDER_FRACTION = 0.5          # Score lost, as a fraction of the win score, that makes a move a blunder
+SPIKE_FACTOR = 4                # An engine move is a time spike at this many times the game's median engine time...
+SPIKE_MIN_MS = 20               # ...if it also took at least this long
+SLOWEST_POSITIONS = 20          # Slowest engine moves kept for the summary
+DEFAULT_CACHE_ENTRIES = 100_000
+PENDING_GAMES_PER_WORKER = 4    # Games queued ahead of each worker; keeps memory flat for any file size
+
+# Per-process state of the pool workers
+_worker_table = None
+
+
+def _initialize_worker():
+    global _worker_table
+    _worker_table = TranspositionTable()
+
+
+def _score_positions(positions: list[tuple[list[str], str]], depth_limit: int,
+                     win_length: int) -> list[list[tuple[int, float]]]:
+    # Runs in a pool worker, with a transposition table that persists between games
+    return [compute_move_candidates(board_state, player_symbol, depth_limit, True, _worker_table,
+                                    use_bitboard=True, win_length=win_length)
+            for board_state, player_symbol in positions]
+
+
+class _PreparedGame:
+    """
+        A record replayed in the parent: per ply, the position, its cache key and the candidates
+        already found in the cache; the positions still to be searched are in `misses`.
+    """
+
+    def __init__(self, game: int, record: dict, depth_limit: int):
+        self.game = game
+        self.record = record
+        self.depth_limit = depth_limit
+        self.plies = []     # [board string, symbol, move, key, permutation, canonical candidates or None]
+        self.misses = []    # (ply, board list, symbol) of the positions not in the cache
+
+
+class RecordAnalyzer:
+    """
+        Re-score every move of a stream of game records with the engine and report blunders and
+        engine time spikes.
+
+            Each record is replayed in the parent process. Positions are reduced by symmetry
+            (`GameState.canonical_hash`) and looked up in one LRU cache of candidate scores shared by
+            all games; only the positions missing from it are sent, one batch per game, to a pool
+            of worker processes. Each position is scored with `compute_move_candidates` at the
+            record's `depth_cap` (the deepest search the GUI allows on that board) unless a depth is
+            given, so the scores are those of the strongest engine setting.
+
+            A move is a blunder when it gives away at least `BLUNDER_FRACTION` of the win score
+            compared with the best move, from the mover's point of view: a missed win, or a move
+            into a forced loss. Moves outside the engine's candidate cells (on the larger boards,
+            cells far from every mark) are not judged. An engine move is a time spike when its
+            recorded search time is at least `SPIKE_FACTOR` times the median engine time of its game
+            and at least `SPIKE_MIN_MS`.
+
+            Only a few games per worker are in flight, the cache is bounded and the summary keeps
+            running totals and the `SLOWEST_POSITIONS` slowest moves, so memory does not grow with
+            the size of the record file.
+
+            Args:
+                depth_limit (int | None): Search depth below each root move; None uses each record's
+                `depth_cap`.
+                max_workers (int | None): Number of worker processes (default: the CPU count).
+                cache_entries (int): Size of the shared position cache.
+    """
+
+    def __init__(self, depth_limit: int | None = None, max_workers: int | None = None,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.depth_limit = depth_limit
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_entries = cache_entries
+        self.cache = OrderedDict()
+        self.counts = {"games": 0, "invalid": 0, "positions": 0, "cache": 0, "search": 0}
+
+    def analyze(self, records):
+        """
+            Analyze `(game, record)` pairs, e.g. from `iter_game_records`, yielding one analysis per
+            valid game as soon as it finishes.
+
+                Analyses arrive in completion order, not file order. Each is a dict with the game
+                number, its settings and the list of `findings` (see `_finish`).
+        """
+        pending_limit = self.max_workers * PENDING_GAMES_PER_WORKER
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_initialize_worker) as executor:
+            pending = {}
+            for game, record in records:
+                prepared = self._prepare(game, record)
+                if prepared is None:
+                    continue
+                if not prepared.misses:
+                    yield self._finish(prepared, [])
+                    continue
+                positions = [(board_state, symbol) for _, board_state, symbol in prepared.misses]
+                future = executor.submit(_score_positions, positions, prepared.depth_limit,
+                                         record["win_length"])
+                pending[future] = prepared
+                if len(pending) >= pending_limit:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._finish(pending.pop(future), future.result())
+            for future in list(pending):
+                yield self._finish(pending.pop(future), future.result())
+
+    def _prepare(self, game: int, record: dict) -> _PreparedGame | None:
+        # Replay the record and collect the cached and missing positions; None for an invalid record
+        try:
+            board_size = record["board_size"]
+            win_length = record["win_length"]
+            depth_limit = self.depth_limit if self.depth_limit is not None else record["depth_cap"]
+            state = GameState(["-"] * (board_size * board_size), win_length)
+            prepared = _PreparedGame(game, record, depth_limit)
+            symbol = "X"
+            for ply, move in enumerate(record["moves"]):
+                if state.is_terminal or not 0 <= move < len(state.board) or state.board[move] != "-":
+                    raise ValueError(f"illegal move {move} at ply {ply}")
+                canonical, permutation = state.canonical_hash()
+                # The canonical hash does not encode the board size (the empty board hashes to 0 on every size)
+                key = (canonical, board_size, symbol, depth_limit, win_length)
+                canonical_candidates = self.cache.get(key)
+                if canonical_candidates is not None:
+                    self.cache.move_to_end(key)
+                    self.counts["cache"] += 1
+                else:
+                    prepared.misses.append((ply, list(state.board), symbol))
+                    self.counts["search"] += 1
+                prepared.plies.append(["".join(state.board), symbol, move, key, permutation, canonical_candidates])
+                state.make_move(move, symbol)
+                symbol = "O" if symbol == "X" else "X"
+        except (KeyError, TypeError, ValueError):
+            self.counts["invalid"] += 1
+            return None
+        self.counts["positions"] += len(prepared.plies)
+        return prepared
+
+    def _finish(self, prepared: _PreparedGame, scored: list[list[tuple[int, float]]]) -> dict:
+        """
+            Store the searched positions in the cache and judge every move of the game.
+
+                Returns:
+                    dict: `{"game", "settings", "moves", "findings"}`. Each finding is a dict with the
+                    `kind` ("blunder" or "time_spike"), the `ply`, the `player` ("human" or "engine"),
+                    the `symbol`, the `board` before the move (row by row), the `move`, the engine's
+                    `best_move`, the score `loss` of the move (None if it was not judged) and the
+                    recorded `engine_ms`.
+        """
+        for (ply, _, _), candidates in zip(prepared.misses, scored):
+            entry = prepared.plies[ply]
+            permutation = entry[4]
+            entry[5] = [(permutation.index(index), score) for index, score in candidates]
+            self.cache[entry[3]] = entry[5]
+            if len(self.cache) > self.cache_entries:
+                self.cache.popitem(last=False)
+
+        record = prepared.record
+        settings = {key: value for key, value in record.items() if key not in ("moves", "engine_ms", "result")}
+        human_symbol = record.get("human")
+        engine_ms = record.get("engine_ms") or [None] * len(prepared.plies)
+        engine_times = [ms for ms in engine_ms if ms is not None]
+        spike_ms = max(SPIKE_FACTOR * median(engine_times), SPIKE_MIN_MS) if engine_times else None
+        win_score = get_evaluation_tables(record["board_size"] ** 2, record["win_length"])[0]
+
+        findings = []
+        for ply, (board, symbol, move, _, permutation, canonical_candidates) in enumerate(prepared.plies):
+            sign = 1 if symbol == "X" else -1
+            scores = {permutation[index]: sign * score for index, score in canonical_candidates}
+            best_move = max(sorted(scores), key=scores.get) if scores else None
+            loss = scores[best_move] - scores[move] if move in scores else None
+            ms = engine_ms[ply] if ply < len(engine_ms) else None
+            finding = {"ply": ply, "player": "human" if symbol == human_symbol else "engine", "symbol": symbol,
+                       "board": board, "move": move, "best_move": best_move, "loss": loss, "engine_ms": ms}
+            if loss is not None and loss >= BLUNDER_FRACTION * win_score:
+                findings.append({"kind": "blunder", **finding})
+            if ms is not None and spike_ms is not None and ms >= spike_ms:
+                findings.append({"kind": "time_spike", **finding})
+
+        self.counts["games"] += 1
+        return {"game": prepared.game, "settings": settings, "moves": len(prepared.plies),
+                "engine_ms": engine_ms, "boards": [entry[0] for entry in prepared.plies], "findings": findings}
+
+
+class AnalysisSummary:
+    """
+        Running totals over game analyses: blunders per player, time spikes, engine time per
+        setting and the `SLOWEST_POSITIONS` slowest engine moves.
+    """
+
+    def __init__(self, slowest_positions: int = SLOWEST_POSITIONS):
+        self.slowest_positions = slowest_positions
+        self.games = 0
+        self.moves = 0
+        self.blunders = {"human": 0, "engine": 0}
+        self.time_spikes = 0
+        self.engine_time = {}     # (board size, algorithm, difficulty) → [moves, total ms, max ms]
+        self.slowest = []         # Min-heap of (ms, order, position)
+        self.order = count()
+
+    def add(self, analysis: dict):
+        self.games += 1
+        self.moves += analysis["moves"]
+        for finding in analysis["findings"]:
+            if finding["kind"] == "blunder":
+                self.blunders[finding["player"]] += 1
+            else:
+                self.time_spikes += 1
+
+        settings = analysis["settings"]
+        group = (settings.get("board_size"), settings.get("algorithm"), settings.get("difficulty"))
+        totals = self.engine_time.setdefault(group, [0, 0.0, 0.0])
+        for ply, ms in enumerate(analysis["engine_ms"]):
+            if ms is None:
+                continue
+            totals[0] += 1
+            totals[1] += ms
+            totals[2] = max(totals[2], ms)
+            if len(self.slowest) < self.slowest_positions or ms > self.slowest[0][0]:
+                position = {"game": analysis["game"], "ply": ply, "board": analysis["boards"][ply], "engine_ms": ms,
+                            "algorithm": settings.get("algorithm"), "difficulty": settings.get("difficulty")}
+                item = (ms, next(self.order), position)
+                if len(self.slowest) < self.slowest_positions:
+                    heapq.heappush(self.slowest, item)
+                else:
+                    heapq.heapreplace(self.slowest, item)
+
+    def as_dict(self) -> dict:
+        return {
+            "games": self.games,
+            "moves": self.moves,
+            "blunders": self.blunders,
+            "time_spikes": self.time_spikes,
+            "engine_time": [
+                {"board_size": board_size, "algorithm": algorithm, "difficulty": difficulty, "moves": moves,
+                 "average_ms": total_ms / moves, "max_ms": max_ms}
+                for (board_size, algorithm, difficulty), (moves, total_ms, max_ms)
+                in sorted(self.engine_time.items(), key=lambda item: tuple(map(str, item[0]))) if moves
+            ],
+            "slowest": [position for _, _, position in sorted(self.slowest, reverse=True)],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded games and report blunders and slow moves.")
+    parser.add_argument("records", nargs="?", default=GAME_RECORDS_PATH,
+                        help="Record file written by the GUI (.jsonl, or .jsonl.gz).")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="Search depth below each move (default: each record's depth cap).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES,
+                        help="Size of the shared position cache.")
+    parser.add_argument("--output", default="-", help="Where to stream findings as JSON lines ('-' for stdout).")
+    arguments = parser.parse_args()
+
+    analyzer = RecordAnalyzer(arguments.depth, arguments.workers, arguments.cache_entries)
+    summary = AnalysisSummary()
+    output = sys.stdout if arguments.output == "-" else open(arguments.output, "w")
+    try:
+        for analysis in analyzer.analyze(iter_game_records(arguments.records)):
+            summary.add(analysis)
+            for finding in analysis["findings"]:
+                output.write(json.dumps({"game": analysis["game"], **finding}) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    result = summary.as_dict()
+    counts = analyzer.counts
+    print(f"{result['games']} games ({counts['invalid']} invalid), {result['moves']} moves, "
+          f"{counts['search']} positions searched, {counts['cache']} from the cache", file=sys.stderr)
+    print(f"Blunders: human {result['blunders']['human']}, engine {result['blunders']['engine']}; "
+          f"time spikes: {result['time_spikes']}", file=sys.stderr)
+    for group in result["engine_time"]:
+        print(f"{group['board_size']}×{group['board_size']} {group['algorithm']}:{group['difficulty']}: "
+              f"{group['average_ms']:.2f} ms/move, max {group['max_ms']:.2f} ms over {group['moves']} moves",
+              file=sys.stderr)
+    for position in result["slowest"]:
+        print(f"{position['engine_ms']:.2f} ms: game {position['game']} ply {position['ply']} {position['board']} "
+              f"({position['algorithm']}:{position['difficulty']})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+from typing import NamedTuple
+
+from algorithm_functions import (compute_best_move, compute_best_move_budgeted, compute_best_move_plain,
+                                 compute_best_move_timed)
+from game_functions import DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH, get_candidate_moves, get_winner, has_moves_left
+from mcts_search import MCTSTree, compute_best_move_mcts
+from negamax_functions import compute_best_move_negamax
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+
+ALGORITHMS = ("minimax", "alpha-beta", "timed", "negamax", "mtdf", "mcts", "skill")
+SYMBOL_MODES = ("X", "O", "alternate")
+PENDING_GAMES_PER_WORKER = 4    # Games queued ahead of each worker; keeps memory flat for millions of games
+
+
+class EngineConfig(NamedTuple):
+    """
+        One side of an arena match.
+
+            `depth_limit` is the search depth below each root move (the GUI uses difficulty - 1).
+            For the "timed" algorithm it caps iterative deepening, which otherwise runs until
+            `time_budget_ms` is spent. "negamax" and "mtdf" search with `compute_best_move_negamax`
+            (aspiration windows or MTD(f)), which always runs on the list engine. "mcts" ignores the
+            depth and runs the playout budget of its difficulty, on a tree kept for the whole game.
+            "skill" plays with `compute_best_move_budgeted`: the node budget and error model of its
+            difficulty, capped at `depth_limit`.
+    """
+    algorithm: str
+    difficulty: int
+    depth_limit: int
+    time_budget_ms: float = 100
+    use_bitboard: bool = True
+
+    def describe(self) -> str:
+        return f"{self.algorithm}:{self.difficulty}:{self.depth_limit}"
+
+
+def parse_engine(spec: str, time_budget_ms: float = 100, use_bitboard: bool = True) -> EngineConfig:
+    """
+        Parse an engine spec of the form `ALGORITHM[:DIFFICULTY[:DEPTH]]`, e.g. `alpha-beta:9:8`.
+
+            The difficulty defaults to 9 and the depth to difficulty - 1, as in the GUI.
+    """
+    parts = spec.split(":")
+    if parts[0] not in ALGORITHMS or len(parts) > 3:
+        raise argparse.ArgumentTypeError(f"invalid engine '{spec}'; expected ALGORITHM[:DIFFICULTY[:DEPTH]] "
+                                         f"with ALGORITHM one of {', '.join(ALGORITHMS)}")
+    try:
+        difficulty = int(parts[1]) if len(parts) > 1 else 9
+        depth_limit = int(parts[2]) if len(parts) > 2 else max(difficulty - 1, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid engine '{spec}'; difficulty and depth must be integers")
+
+    return EngineConfig(parts[0], difficulty, depth_limit, time_budget_ms, use_bitboard)
+
+
+def choose_engine_move(engine: EngineConfig, board_state: list[str], player_symbol: str,
+                       transposition_table: TranspositionTable, win_length: int, stats: SearchStats,
+                       tree: MCTSTree | None = None) -> int:
+    if engine.algorithm == "mcts":
+        return compute_best_move_mcts(board_state, player_symbol, engine.difficulty, win_length, tree=tree,
+                                      stats=stats)
+    if engine.algorithm == "timed":
+        return compute_best_move_timed(board_state, player_symbol, engine.time_budget_ms, engine.difficulty,
+                                       transposition_table, engine.use_bitboard, win_length,
+                                       max_depth=engine.depth_limit, stats=stats)
+    if engine.algorithm == "skill":
+        return compute_best_move_budgeted(board_state, player_symbol, engine.depth_limit, engine.difficulty,
+                                          transposition_table, engine.use_bitboard, win_length, stats=stats)
+    if engine.algorithm in ("negamax", "mtdf"):
+        return compute_best_move_negamax(board_state, player_symbol, engine.depth_limit, engine.difficulty,
+                                         transposition_table, engine.algorithm == "mtdf", win_length, stats=stats)
+    if engine.algorithm == "minimax":
+        return compute_best_move_plain(board_state, player_symbol, engine.depth_limit, engine.difficulty,
+                                       transposition_table, engine.use_bitboard, win_length, stats=stats)
+    return compute_best_move(board_state, player_symbol, engine.depth_limit, engine.difficulty,
+                             transposition_table, engine.use_bitboard, win_length, stats=stats)
+
+
+def play_game(game_index: int, engine_a: EngineConfig, engine_b: EngineConfig, a_symbol: str,
+              board_size: int = DEFAULT_BOARD_SIZE, win_length: int = DEFAULT_WIN_LENGTH,
+              opening_plies: int = 0, seed: int | None = None) -> dict:
+    """
+        Play one game between two engines and return its record.
+
+            Each engine gets a fresh transposition table and MCTS tree per game, as it would in the
+            GUI. The first `opening_plies` moves are played at random, which is the only way to get
+            varied games between two deterministic engines (difficulty 5 and above).
+
+            Args:
+                game_index (int): Index of the game, echoed in the record and mixed into the seed.
+                engine_a (EngineConfig): The first engine.
+                engine_b (EngineConfig): The second engine.
+                a_symbol (str): The symbol engine A plays ("X" or "O"). X always moves first.
+                board_size (int): The side length of the board.
+                win_length (int): The number of marks in a row needed to win.
+                opening_plies (int): Number of random moves played before the engines take over.
+                seed (int | None): Base random seed. With a seed, game `i` is reproducible on its own.
+
+            Returns:
+                dict: The game record: index, symbols, result ("A", "B" or "draw"), the moves played
+                and, per engine, the number of moves searched, their total seconds and nodes.
+    """
+    # Reseed every game (also seeds `choose_move_with_noise`); forked workers would otherwise share one sequence
+    random.seed(None if seed is None else seed * 1_000_003 + game_index)
+    engines = {a_symbol: ("A", engine_a), ("O" if a_symbol == "X" else "X"): ("B", engine_b)}
+    tables = {"A": TranspositionTable(), "B": TranspositionTable()}
+    trees = {"A": MCTSTree(random.getrandbits(32)), "B": MCTSTree(random.getrandbits(32))}
+    totals = {"A": {"moves": 0, "seconds": 0.0, "nodes": 0}, "B": {"moves": 0, "seconds": 0.0, "nodes": 0}}
+
+    board_state = ["-"] * (board_size * board_size)
+    moves = []
+    player_symbol = "X"
+    winner = None
+    while winner is None and has_moves_left(board_state):
+        name, engine = engines[player_symbol]
+        if len(moves) < opening_plies:
+            index = random.choice(get_candidate_moves(board_state))
+        else:
+            stats = SearchStats()
+            started = perf_counter()
+            index = choose_engine_move(engine, board_state, player_symbol, tables[name], win_length, stats,
+                                       trees[name])
+            totals[name]["seconds"] += perf_counter() - started
+            totals[name]["nodes"] += stats.nodes
+            totals[name]["moves"] += 1
+        board_state[index] = player_symbol
+        moves.append(index)
+        winner = get_winner(board_state, win_length)
+        player_symbol = "O" if player_symbol == "X" else "X"
+
+    return {
+        "game": game_index,
+        "a_symbol": a_symbol,
+        "result": engines[winner][0] if winner else "draw",
+        "moves": moves,
+        "a": totals["A"],
+        "b": totals["B"],
+    }
+
+
+def generate_games(game_count: int, symbol_mode: str):
+    for game_index in range(game_count):
+        if symbol_mode == "alternate":
+            yield game_index, "X" if game_index % 2 == 0 else "O"
+        else:
+            yield game_index, symbol_mode
+
+
+def run_arena(engine_a: EngineConfig, engine_b: EngineConfig, game_count: int, symbol_mode: str = "alternate",
+              board_size: int = DEFAULT_BOARD_SIZE, win_length: int = DEFAULT_WIN_LENGTH, opening_plies: int = 0,
+              seed: int | None = None, max_workers: int | None = None):
+    """
+        Play `game_count` games across a process pool, yielding each record as soon as it finishes.
+
+            Only a few games per worker are queued at any time, so memory use does not grow with
+            `game_count`. Records arrive in completion order, not index order.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    pending_limit = max_workers * PENDING_GAMES_PER_WORKER
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for game_index, a_symbol in generate_games(game_count, symbol_mode):
+            pending.add(executor.submit(play_game, game_index, engine_a, engine_b, a_symbol, board_size,
+                                        win_length, opening_plies, seed))
+            if len(pending) >= pending_limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+class ArenaSummary:
+    """
+        Running totals over game records: results from engine A's point of view plus per-engine
+        move latency and node counts.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.results = {"A": 0, "draw": 0, "B": 0}
+        self.engines = {"a": {"moves": 0, "seconds": 0.0, "nodes": 0}, "b": {"moves": 0, "seconds": 0.0, "nodes": 0}}
+
+    def add(self, record: dict):
+        self.games += 1
+        self.results[record["result"]] += 1
+        for side in ("a", "b"):
+            for field in ("moves", "seconds", "nodes"):
+                self.engines[side][field] += record[side][field]
+
+    def as_dict(self) -> dict:
+        games = max(self.games, 1)
+        summary = {
+            "games": self.games,
+            "a_wins": self.results["A"] / games,
+            "draws": self.results["draw"] / games,
+            "a_losses": self.results["B"] / games,
+        }
+        for side, totals in self.engines.items():
+            moves = max(totals["moves"], 1)
+            summary[side] = {
+                "moves": totals["moves"],
+                "average_move_ms": 1000 * totals["seconds"] / moves,
+                "average_nodes": totals["nodes"] / moves,
+                "total_nodes": totals["nodes"],
+            }
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine games without the GUI.")
+    parser.add_argument("engine_a", help="First engine, ALGORITHM[:DIFFICULTY[:DEPTH]], e.g. alpha-beta:9:8.")
+    parser.add_argument("engine_b", help="Second engine, in the same format.")
+    parser.add_argument("--games", type=int, default=100, help="Number of games to play.")
+    parser.add_argument("--a-symbol", choices=SYMBOL_MODES, default="alternate",
+                        help="Symbol engine A plays; 'alternate' switches every game.")
+    parser.add_argument("--board-size", type=int, default=DEFAULT_BOARD_SIZE)
+    parser.add_argument("--win-length", type=int, default=DEFAULT_WIN_LENGTH)
+    parser.add_argument("--opening-plies", type=int, default=0, help="Random moves played before the engines.")
+    parser.add_argument("--time-budget-ms", type=float, default=100, help="Per-move budget of 'timed' engines.")
+    parser.add_argument("--list-engine", action="store_true", help="Search with the list engine, not bitboards.")
+    parser.add_argument("--seed", type=int, default=None, help="Base seed for reproducible games.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--output", default="-", help="Where to stream per-game JSON lines ('-' for stdout).")
+    arguments = parser.parse_args()
+
+    try:
+        engine_a = parse_engine(arguments.engine_a, arguments.time_budget_ms, not arguments.list_engine)
+        engine_b = parse_engine(arguments.engine_b, arguments.time_budget_ms, not arguments.list_engine)
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+
+    summary = ArenaSummary()
+    output = sys.stdout if arguments.output == "-" else open(arguments.output, "w")
+    try:
+        for record in run_arena(engine_a, engine_b, arguments.games, arguments.a_symbol, arguments.board_size,
+                                arguments.win_length, arguments.opening_plies, arguments.seed, arguments.workers):
+            summary.add(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    result = summary.as_dict()
+    print(f"A = {engine_a.describe()}, B = {engine_b.describe()}, {result['games']} games", file=sys.stderr)
+    print(f"A wins {result['a_wins']:.1%}, draws {result['draws']:.1%}, A losses {result['a_losses']:.1%}",
+          file=sys.stderr)
+    for side in ("a", "b"):
+        engine = result[side]
+        print(f"{side.upper()}: {engine['average_move_ms']:.2f} ms/move, {engine['average_nodes']:.0f} nodes/move, "
+              f"{engine['total_nodes']} nodes in {engine['moves']} moves", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from functools import lru_cache
+from math import isqrt
+
+from game_functions import (BONUS, BONUS_SCALE, DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH, WINNING_LINES,
+                            get_candidate_moves, get_centre_cells, get_win_score, get_winning_lines)
+
+try:
+    import numpy as np
+except ImportError:     # NumPy is optional; only batch evaluation needs it
+    np = None
+
+EMPTY_VALUE = 0
+X_VALUE = 1
+O_VALUE = -1
+
+X_WIN = 1
+O_WIN = -1
+NO_WIN = 0
+
+LINE_TERM = BONUS_SCALE
+THREAT_TERM = BONUS_SCALE ** 2 * BONUS
+CENTRE_TERM = BONUS_SCALE ** 2 * BONUS
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Batch evaluation needs NumPy; install it with `pip install numpy`")
+
+
+@lru_cache(maxsize=None)
+def get_line_matrix(board_size: int = DEFAULT_BOARD_SIZE, win_length: int = DEFAULT_WIN_LENGTH):
+    """
+        Build the line-index matrix for a configuration: one row per winning line, holding the
+        cell indexes of that line in `get_winning_lines` order (`WINNING_LINES` on the classic board).
+
+            Returns:
+                np.ndarray: An `(lines, win_length)` integer array. Indexing a `(N, cells)` board
+                array with it gives every line of every board as a `(N, lines, win_length)` array.
+    """
+    _require_numpy()
+    lines = WINNING_LINES if (board_size, win_length) == (DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH) \
+        else get_winning_lines(board_size, win_length)
+    return np.array(lines, dtype=np.intp)
+
+
+def boards_to_array(board_states: list[list[str]]):
+    """
+        Encode boards as an `(N, cells)` int8 array with `X_VALUE`, `O_VALUE` and `EMPTY_VALUE`.
+    """
+    _require_numpy()
+    symbols = np.array(board_states)
+    return (symbols == "X").astype(np.int8) - (symbols == "O").astype(np.int8)
+
+
+def evaluate_boards(boards, win_length: int = DEFAULT_WIN_LENGTH):
+    """
+        Evaluate many boards at once, with the same results as `evaluate_board_state`.
+
+            Every step of `evaluate_board_state` is done as an array operation over all boards and
+            lines together: the boards are gathered through the line-index matrix, X and O marks are
+            counted per line, and the win checks, open lines and threats are reduced over the line
+            axis. As in `evaluate_board_state`, the first completed line (in line order) decides a
+            board that holds completed lines for both sides.
+
+            Args:
+                boards (np.ndarray): An `(N, cells)` int8 array as produced by `boards_to_array`.
+                All boards must have the same size.
+                win_length (int): The number of marks in a row needed to win.
+
+            Returns:
+                tuple[np.ndarray, np.ndarray]: `(outcomes, scores)`. `outcomes` holds `X_WIN`,
+                `O_WIN` or `NO_WIN` per board; `scores` holds what `evaluate_board_state` returns
+                for each board (±win score for decided boards).
+    """
+    _require_numpy()
+    board_size = isqrt(boards.shape[1])
+    lines = boards[:, get_line_matrix(board_size, win_length)]
+    x_counts = np.count_nonzero(lines == X_VALUE, axis=2)
+    o_counts = np.count_nonzero(lines == O_VALUE, axis=2)
+
+    # Terminal boards: the first completed line decides
+    x_complete = x_counts == win_length
+    completed = x_complete | (o_counts == win_length)
+    is_decided = completed.any(axis=1)
+    first_completed = completed.argmax(axis=1)
+    x_won = x_complete[np.arange(len(boards)), first_completed]
+    outcomes = np.where(is_decided, np.where(x_won, X_WIN, O_WIN), NO_WIN).astype(np.int8)
+
+    x_open = o_counts == 0  # Still winnable for X
+    o_open = x_counts == 0  # Still winnable for O
+    open_balance = np.count_nonzero(x_open, axis=1) - np.count_nonzero(o_open, axis=1)
+    threat_balance = (np.count_nonzero(x_open & (x_counts == win_length - 1), axis=1)
+                      - np.count_nonzero(o_open & (o_counts == win_length - 1), axis=1))
+    centre_balance = boards[:, list(get_centre_cells(board_size))].sum(axis=1, dtype=np.int64)
+
+    scores = LINE_TERM * open_balance + THREAT_TERM * threat_balance + CENTRE_TERM * centre_balance
+    scores = np.where(is_decided, get_win_score(board_size, win_length) * outcomes.astype(np.int64), scores)
+    return outcomes, scores
+
+
+def score_child_positions(board_state: list[str], player: str, moves: list[int],
+                          win_length: int = DEFAULT_WIN_LENGTH):
+    """
+        Score every child of a position in one `evaluate_boards` call.
+
+            Returns:
+                np.ndarray: The `evaluate_board_state` score of the board after each of `moves` is
+                played by `player`, in the order of `moves`.
+    """
+    children = np.repeat(boards_to_array([board_state]), len(moves), axis=0)
+    children[np.arange(len(moves)), moves] = X_VALUE if player == "X" else O_VALUE
+    return evaluate_boards(children, win_length)[1]
+
+
+def get_ordered_moves_batch(board_state: list[str], player: str, win_length: int = DEFAULT_WIN_LENGTH) -> list[int]:
+    """
+        Batch counterpart of `get_ordered_moves`: the same move order, with all children scored in
+        a single array call. Ties keep index order, as Python's stable sort does.
+    """
+    moves = get_candidate_moves(board_state)
+    if not moves:
+        return []
+    scores = score_child_positions(board_state, player, moves, win_length)
+    order = np.argsort(-scores if player == "X" else scores, kind="stable")
+    return [moves[i] for i in order]
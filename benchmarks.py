@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import tracemalloc
+from time import perf_counter
+
+from algorithm_functions import compute_move_candidates
+from bitboard_functions import CLASSIC_LAYOUT
+from game_functions import get_ordered_moves
+from move_ordering import MoveOrderer
+from negamax_functions import compute_best_move_negamax
+from search_stats import SearchStats
+
+# Fixed 3×3 positions, written row by row. The side to move follows from the number of marks.
+CORPUS = {
+    "opening": ("---------", "----X----", "X---O----", "-X--O----"),
+    "midgame": ("X-O-X-O--", "XO--X---O", "-OX-X-O--", "XOX-O----"),
+    "near-terminal": ("XOXXOO-X-", "XOXOXO---", "OX-XXO-O-", "XOXOOX-X-"),
+}
+DEPTHS = tuple(range(9))
+ORDERING_REPEATS = 500          # `get_ordered_moves` is too fast to time over one pass of the corpus
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10        # Fail when throughput drops by more than 10%
+
+
+def _side_to_move(board_state: list[str]) -> str:
+    return "X" if board_state.count("X") == board_state.count("O") else "O"
+
+
+def _corpus_boards() -> list[list[str]]:
+    return [list(position) for positions in CORPUS.values() for position in positions]
+
+
+def _search_engine(use_pruning: bool, use_bitboard: bool, dynamic_ordering: bool = False):
+    def run(depth_limit, stats):
+        for board_state in _corpus_boards():
+            move_orderer = MoveOrderer() if dynamic_ordering else None
+            compute_move_candidates(board_state, _side_to_move(board_state), depth_limit, use_pruning,
+                                    use_bitboard=use_bitboard, stats=stats, move_orderer=move_orderer)
+    return run
+
+
+def _negamax_engine(use_mtdf: bool):
+    def run(depth_limit, stats):
+        for board_state in _corpus_boards():
+            compute_best_move_negamax(board_state, _side_to_move(board_state), depth_limit, 9, use_mtdf=use_mtdf,
+                                      stats=stats)
+    return run
+
+
+def _ordering_engine(_, stats):
+    boards = _corpus_boards()
+    for _ in range(ORDERING_REPEATS):
+        for board_state in boards:
+            stats.nodes += len(get_ordered_moves(board_state, _side_to_move(board_state)))
+
+
+# Each engine runs the whole corpus at one depth limit. "minimax_search_dynamic" orders moves with a
+# `MoveOrderer` (killers and history) instead of the static ordering. The negamax engines pick the best
+# move at difficulty 9, so only the root moves that could take over are searched exactly; their node counts
+# include every iterative deepening iteration. `get_ordered_moves` has no depth, so it runs once and counts
+# every child position it scores as a node.
+ENGINES = {
+    "minimax_plain": (_search_engine(False, False), DEPTHS),
+    "minimax_search": (_search_engine(True, False), DEPTHS),
+    "minimax_search_dynamic": (_search_engine(True, False, dynamic_ordering=True), DEPTHS),
+    "minimax_plain_bitboard": (_search_engine(False, True), DEPTHS),
+    "minimax_search_bitboard": (_search_engine(True, True), DEPTHS),
+    "negamax_pvs": (_negamax_engine(False), DEPTHS),
+    "negamax_mtdf": (_negamax_engine(True), DEPTHS),
+    "get_ordered_moves": (_ordering_engine, (None,)),
+}
+
+
+def measure(engine, depth_limit, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+        Run one engine over the corpus at one depth limit.
+
+            The wall time is the best of `repeat` runs; peak memory is taken from one extra run under
+            `tracemalloc`, which would otherwise slow the timed runs down. The bitboard caches are
+            cleared before every run, so each one starts cold.
+
+            Returns:
+                dict: Wall time, nodes, nodes per second, cutoffs and peak memory of the run.
+    """
+    wall_seconds = float("inf")
+    stats = SearchStats()
+    for _ in range(repeat):
+        CLASSIC_LAYOUT.clear_caches()
+        stats.clear()
+        started = perf_counter()
+        engine(depth_limit, stats)
+        wall_seconds = min(wall_seconds, perf_counter() - started)
+
+    CLASSIC_LAYOUT.clear_caches()
+    tracemalloc.start()
+    engine(depth_limit, SearchStats())
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_seconds": wall_seconds,
+        "nodes": stats.nodes,
+        "nodes_per_second": stats.nodes / wall_seconds if wall_seconds else 0.0,
+        "cutoffs": stats.cutoffs,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_benchmarks(engine_names: list[str], repeat: int = DEFAULT_REPEAT, report=None) -> dict:
+    """
+        Benchmark the given engines at every depth of the corpus.
+
+            Args:
+                engine_names (list[str]): Keys of `ENGINES` to run.
+                repeat (int): Timed runs per measurement; the fastest one counts.
+                report (Callable[[str, int | None, dict], None] | None): Optional callback receiving
+                each measurement as soon as it is taken.
+
+            Returns:
+                dict: `{engine: {"depths": {depth: measurement}, "total": totals}}`, where the totals
+                sum wall time, nodes and cutoffs over all depths and give the overall nodes per
+                second, the figure regressions are judged on.
+    """
+    results = {}
+    for name in engine_names:
+        engine, depths = ENGINES[name]
+        measurements = {}
+        for depth_limit in depths:
+            measurement = measure(engine, depth_limit, repeat)
+            measurements["all" if depth_limit is None else str(depth_limit)] = measurement
+            if report is not None:
+                report(name, depth_limit, measurement)
+
+        wall_seconds = sum(measurement["wall_seconds"] for measurement in measurements.values())
+        nodes = sum(measurement["nodes"] for measurement in measurements.values())
+        results[name] = {
+            "depths": measurements,
+            "total": {
+                "wall_seconds": wall_seconds,
+                "nodes": nodes,
+                "nodes_per_second": nodes / wall_seconds if wall_seconds else 0.0,
+                "cutoffs": sum(measurement["cutoffs"] for measurement in measurements.values()),
+                "peak_memory_bytes": max(measurement["peak_memory_bytes"] for measurement in measurements.values()),
+            },
+        }
+
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+        Compare total throughput against a saved baseline.
+
+            Returns:
+                list[str]: One message per engine whose nodes per second fell by more than
+                `threshold` (a fraction). Engines missing from either side are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        current = result["total"]["nodes_per_second"]
+        previous = baseline[name]["total"]["nodes_per_second"]
+        if current < previous * (1 - threshold):
+            regressions.append(f"{name}: {current:,.0f} nodes/s vs {previous:,.0f} in the baseline "
+                               f"({current / previous - 1:+.1%})")
+
+    return regressions
+
+
+def _print_measurement(name: str, depth_limit: int | None, measurement: dict):
+    depth = "-" if depth_limit is None else depth_limit
+    print(f"{name:<24} {depth:>5} {measurement['wall_seconds'] * 1000:>10.2f} {measurement['nodes']:>10} "
+          f"{measurement['nodes_per_second']:>12,.0f} {measurement['cutoffs']:>8} "
+          f"{measurement['peak_memory_bytes'] / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search engines over a fixed corpus of positions.")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="Engines to benchmark (default: all).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per measurement.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Save the results as the new baseline.")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail if throughput regressed against this baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed throughput drop as a fraction (default: 0.10).")
+    arguments = parser.parse_args()
+
+    print(f"{'engine':<24} {'depth':>5} {'wall ms':>10} {'nodes':>10} {'nodes/s':>12} {'cutoffs':>8} {'peak KiB':>10}")
+    results = run_benchmarks(arguments.engines, arguments.repeat, _print_measurement)
+
+    for path in (arguments.output, arguments.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, arguments.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No throughput regression beyond {arguments.threshold:.0%} against {arguments.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+from functools import lru_cache
+from typing import Callable
+
+from game_functions import (BONUS, BONUS_SCALE, DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH, get_centre_cells,
+                            get_neighbourhoods, get_win_score, get_winning_lines, promote_move, SearchAborted)
+from search_stats import SearchStats
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable, get_board_symmetries
+
+LINE_TERM = BONUS_SCALE
+THREAT_TERM = BONUS_SCALE ** 2 * BONUS
+CENTRE_TERM = BONUS_SCALE ** 2 * BONUS
+
+LOOKUP_TABLE_MAX_CELLS = 16     # Per-mask lookup tables are only built up to 4×4
+EVALUATION_CACHE_SIZE = 1 << 18
+
+
+def _build_permutation_tables(board_size: int) -> tuple:
+    """
+        Precompute byte-wise lookup tables that apply each board symmetry to a bitmask.
+
+            For every symmetry `p` (see `get_board_symmetries`), the permuted mask has bit `i` set
+            when the original mask has bit `p[i]` set. The mask is processed 8 bits at a time, so a
+            full permutation costs one table lookup per byte instead of one operation per cell.
+    """
+    cells = board_size ** 2
+    tables = []
+    for permutation in get_board_symmetries(board_size):
+        inverse = [0] * cells
+        for target, source in enumerate(permutation):
+            inverse[source] = target
+        chunks = []
+        for chunk_start in range(0, cells, 8):
+            chunk = []
+            for byte in range(256):
+                permuted = 0
+                for bit in range(8):
+                    if byte >> bit & 1 and chunk_start + bit < cells:
+                        permuted |= 1 << inverse[chunk_start + bit]
+                chunk.append(permuted)
+            chunks.append(tuple(chunk))
+        tables.append(tuple(chunks))
+
+    return tuple(tables)
+
+
+class BitboardLayout:
+    """
+        Precomputed masks and tables for one board configuration (size and win length).
+
+            Layouts are built once per configuration by `get_bitboard_layout` and hold the line masks,
+            centre masks, win score, symmetry tables and neighbourhood masks, plus the memoized
+            evaluations and move orderings for that configuration. Small boards additionally get
+            per-mask lookup tables for win detection and empty-cell lists.
+    """
+
+    def __init__(self, board_size: int, win_length: int):
+        self.board_size = board_size
+        self.win_length = win_length
+        self.cells = board_size * board_size
+        self.full_mask = (1 << self.cells) - 1
+        self.line_masks = tuple(sum(1 << index for index in line)
+                                for line in get_winning_lines(board_size, win_length))
+        self.centre_masks = tuple(1 << index for index in get_centre_cells(board_size))
+        self.win_score = get_win_score(board_size, win_length)
+        self.symmetries = get_board_symmetries(board_size)
+        self.permutation_tables = _build_permutation_tables(board_size)
+
+        if board_size <= DEFAULT_BOARD_SIZE:
+            self.neighbour_masks = None     # Every empty cell is a candidate
+        else:
+            self.neighbour_masks = tuple(sum(1 << cell for cell in neighbourhood)
+                                         for neighbourhood in get_neighbourhoods(board_size))
+
+        if self.cells <= LOOKUP_TABLE_MAX_CELLS:
+            self.winning_masks = tuple(any(mask & line == line for line in self.line_masks)
+                                       for mask in range(self.full_mask + 1))
+            self.empty_cells = tuple(tuple(i for i in range(self.cells) if mask >> i & 1)
+                                     for mask in range(self.full_mask + 1))
+        else:
+            self.winning_masks = None
+            self.empty_cells = None
+
+        self.evaluation_cache = {}
+        self.ordering_cache = {}
+
+    def clear_caches(self):
+        self.evaluation_cache.clear()
+        self.ordering_cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_bitboard_layout(board_size: int = DEFAULT_BOARD_SIZE,
+                        win_length: int = DEFAULT_WIN_LENGTH) -> BitboardLayout:
+    return BitboardLayout(board_size, win_length)
+
+
+CLASSIC_LAYOUT = get_bitboard_layout(DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH)
+
+# Classic 3×3 tables, used directly by the solution table
+BOARD_CELLS = CLASSIC_LAYOUT.cells
+FULL_MASK = CLASSIC_LAYOUT.full_mask
+LINE_MASKS = CLASSIC_LAYOUT.line_masks
+PERMUTATION_TABLES = CLASSIC_LAYOUT.permutation_tables
+WINNING_MASKS = CLASSIC_LAYOUT.winning_masks
+EMPTY_CELLS = CLASSIC_LAYOUT.empty_cells
+
+
+def board_to_bitboard(board_state: list[str]) -> tuple[int, int]:
+    """
+        Convert a list board into a pair of bitmasks.
+
+            Args:
+                board_state (list[str]): The game board as a list of "X", "O" and "-" cells.
+
+            Returns:
+                tuple[int, int]: `(x_bits, o_bits)`, where bit `i` is set when cell `i` holds
+                that player's mark.
+    """
+    x_bits = o_bits = 0
+    for index, symbol in enumerate(board_state):
+        if symbol == "X":
+            x_bits |= 1 << index
+        elif symbol == "O":
+            o_bits |= 1 << index
+
+    return x_bits, o_bits
+
+
+def bitboard_to_board(x_bits: int, o_bits: int, cells: int = BOARD_CELLS) -> list[str]:
+    return ["X" if x_bits >> i & 1 else "O" if o_bits >> i & 1 else "-" for i in range(cells)]
+
+
+def iterate_bits(bits: int) -> list[int]:
+    indices = []
+    while bits:
+        lowest = bits & -bits
+        indices.append(lowest.bit_length() - 1)
+        bits ^= lowest
+
+    return indices
+
+
+def permute_bits(bits: int, chunks: tuple) -> int:
+    permuted = 0
+    for chunk in chunks:
+        permuted |= chunk[bits & 0xFF]
+        bits >>= 8
+
+    return permuted
+
+
+def canonical_bitboard_key(x_bits: int, o_bits: int, layout: BitboardLayout = CLASSIC_LAYOUT) -> tuple[int, int]:
+    """
+        Reduce a bitboard to the canonical representative of its symmetry class.
+
+            Returns:
+                tuple[int, int]: The smallest packed `x | o << cells` value over the 8 symmetries
+                and the index of the symmetry that produced it.
+    """
+    best_key = best_symmetry = -1
+    for symmetry, chunks in enumerate(layout.permutation_tables):
+        key = permute_bits(x_bits, chunks) | permute_bits(o_bits, chunks) << layout.cells
+        if best_key < 0 or key < best_key:
+            best_key, best_symmetry = key, symmetry
+
+    return best_key, best_symmetry
+
+
+def has_line(bits: int, layout: BitboardLayout = CLASSIC_LAYOUT) -> bool:
+    if layout.winning_masks is not None:
+        return layout.winning_masks[bits]
+    for mask in layout.line_masks:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def get_empty_cells(x_bits: int, o_bits: int, layout: BitboardLayout = CLASSIC_LAYOUT):
+    empty = layout.full_mask & ~(x_bits | o_bits)
+    if layout.empty_cells is not None:
+        return layout.empty_cells[empty]
+    return iterate_bits(empty)
+
+
+def get_candidate_bitboard_moves(x_bits: int, o_bits: int, layout: BitboardLayout = CLASSIC_LAYOUT):
+    """
+        Bitboard counterpart of `get_candidate_moves`: every empty cell on the classic board,
+        otherwise only the empty cells next to an existing mark, in index order.
+    """
+    if layout.neighbour_masks is None:
+        return get_empty_cells(x_bits, o_bits, layout)
+
+    occupied = x_bits | o_bits
+    if not occupied:
+        return iterate_bits(sum(layout.centre_masks))
+    nearby = 0
+    for index in iterate_bits(occupied):
+        nearby |= layout.neighbour_masks[index]
+
+    return iterate_bits(nearby & ~occupied)
+
+
+def evaluate_bitboard(x_bits: int, o_bits: int, layout: BitboardLayout = CLASSIC_LAYOUT):
+    """
+        Score a bitboard exactly like `evaluate_board_state` scores the equivalent list board.
+
+            Wins are detected by masking each precomputed line, and open lines and two-in-a-row
+            threats are counted from the masked line bits instead of building per-line tuples.
+
+            Args:
+                x_bits (int): Bitmask of the cells held by "X".
+                o_bits (int): Bitmask of the cells held by "O".
+                layout (BitboardLayout): The board configuration.
+
+            Returns:
+                int | float: +/- the layout's win score for a win by "X" / "O", otherwise the
+                heuristic score from X's perspective. Scores are memoized per position, since the
+                same positions recur constantly during the search.
+    """
+    key = x_bits | o_bits << layout.cells
+    score = layout.evaluation_cache.get(key)
+    if score is None:
+        score = _evaluate_bitboard(x_bits, o_bits, layout)
+        if len(layout.evaluation_cache) < EVALUATION_CACHE_SIZE:
+            layout.evaluation_cache[key] = score
+
+    return score
+
+
+def _evaluate_bitboard(x_bits: int, o_bits: int, layout: BitboardLayout):
+    if has_line(x_bits, layout) or has_line(o_bits, layout):   # Terminal win/loss first
+        for mask in layout.line_masks:   # Same line order as `evaluate_board_state`
+            if x_bits & mask == mask:
+                return layout.win_score
+            if o_bits & mask == mask:
+                return -layout.win_score
+
+    threat_count = layout.win_length - 1
+    open_lines_max = open_lines_min = 0
+    two_in_row_max = two_in_row_min = 0
+
+    for mask in layout.line_masks:
+        x_line = x_bits & mask
+        o_line = o_bits & mask
+        if not o_line:  # Still winnable for X
+            open_lines_max += 1
+            if x_line.bit_count() == threat_count:
+                two_in_row_max += 1
+        if not x_line:  # Still winnable for O
+            open_lines_min += 1
+            if o_line.bit_count() == threat_count:
+                two_in_row_min += 1
+
+    line_term = LINE_TERM * (open_lines_max - open_lines_min)
+    threat_term = THREAT_TERM * (two_in_row_max - two_in_row_min)
+
+    centre_balance = 0
+    for mask in layout.centre_masks:
+        if x_bits & mask:
+            centre_balance += 1
+        elif o_bits & mask:
+            centre_balance -= 1
+    centre_term = CENTRE_TERM * centre_balance if centre_balance else 0
+
+    return line_term + threat_term + centre_term
+
+
+def get_ordered_bitboard_moves(x_bits: int, o_bits: int, is_maximizing: bool,
+                               layout: BitboardLayout = CLASSIC_LAYOUT) -> tuple[int, ...]:
+    """
+        Generate the candidate cells of a bitboard in the same order as `get_ordered_moves`.
+
+            The ordering only depends on the position and the side to move, so it is memoized
+            alongside the evaluations.
+    """
+    key = (x_bits | o_bits << layout.cells) << 1 | is_maximizing
+    moves = layout.ordering_cache.get(key)
+    if moves is not None:
+        return moves
+
+    candidates = []
+    for index in get_candidate_bitboard_moves(x_bits, o_bits, layout):
+        move = 1 << index
+        if is_maximizing:
+            candidates.append((index, evaluate_bitboard(x_bits | move, o_bits, layout)))
+        else:
+            candidates.append((index, evaluate_bitboard(x_bits, o_bits | move, layout)))
+
+    moves = tuple(i for i, _ in sorted(candidates, key=lambda pair: pair[1], reverse=is_maximizing))
+    if len(layout.ordering_cache) < EVALUATION_CACHE_SIZE:
+        layout.ordering_cache[key] = moves
+
+    return moves
+
+
+def _make_table_key(x_bits: int, o_bits: int, is_maximizing: bool, remaining_depth: int, layout: BitboardLayout):
+    canonical, symmetry = canonical_bitboard_key(x_bits, o_bits, layout)
+    empty_cells = layout.cells - (x_bits | o_bits).bit_count()
+    # The bitmasks do not encode the board size: the same bits are different positions on another board
+    return (canonical, layout.cells, is_maximizing, min(remaining_depth, empty_cells), layout.win_length), symmetry
+
+
+def minimax_search_bitboard(x_bits: int, o_bits: int, current_depth: int, is_maximizing: bool,
+                            alpha: float, beta: float, depth_limit: int,
+                            transposition_table: TranspositionTable | None = None,
+                            layout: BitboardLayout = CLASSIC_LAYOUT,
+                            should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None):
+    """
+        Bitboard counterpart of `minimax_search` (Minimax with alpha-beta pruning).
+
+            Takes the board as two bitmasks instead of a list and otherwise follows `minimax_search`
+            step for step, including move ordering, transposition table handling, `should_stop` and
+            `stats`, so it returns the same scores and visits the same number of nodes. Since the
+            masks are immutable, an aborted search leaves nothing to restore.
+    """
+    if should_stop is not None and should_stop():
+        raise SearchAborted
+    if stats is not None:
+        stats.enter_node(current_depth, (x_bits, o_bits))
+
+    score = evaluate_bitboard(x_bits, o_bits, layout)
+    if (score == layout.win_score or score == -layout.win_score or current_depth == depth_limit
+            or (x_bits | o_bits) == layout.full_mask):
+        return score
+
+    table_key = symmetry = None
+    hash_move = -1
+    original_alpha, original_beta = alpha, beta
+    if transposition_table is not None:
+        table_key, symmetry = _make_table_key(x_bits, o_bits, is_maximizing, depth_limit - current_depth, layout)
+        entry = transposition_table.probe(table_key)
+        if entry is not None:
+            flag, value, stored_move = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+            hash_move = layout.symmetries[symmetry][stored_move]
+
+    if stats is not None:
+        stats.expanded_nodes += 1
+    best_index = -1
+    if is_maximizing:
+        best_score = float("-inf")
+        for index in promote_move(get_ordered_bitboard_moves(x_bits, o_bits, True, layout), hash_move):
+            value = minimax_search_bitboard(x_bits | 1 << index, o_bits, current_depth + 1, False,
+                                            alpha, beta, depth_limit, transposition_table, layout, should_stop, stats)
+            if value > best_score:
+                best_score, best_index = value, index
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.record_cutoff(current_depth)
+                break
+    else:
+        best_score = float("inf")
+        for index in promote_move(get_ordered_bitboard_moves(x_bits, o_bits, False, layout), hash_move):
+            value = minimax_search_bitboard(x_bits, o_bits | 1 << index, current_depth + 1, True,
+                                            alpha, beta, depth_limit, transposition_table, layout, should_stop, stats)
+            if value < best_score:
+                best_score, best_index = value, index
+            beta = min(beta, best_score)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.record_cutoff(current_depth)
+                break
+
+    if transposition_table is not None:
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= original_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        canonical_move = layout.symmetries[symmetry].index(best_index)
+        transposition_table.store(table_key, flag, best_score, canonical_move)
+
+    return best_score
+
+
+def minimax_plain_bitboard(x_bits: int, o_bits: int, current_depth: int, is_maximizing: bool,
+                           depth_limit: int, transposition_table: TranspositionTable | None = None,
+                           layout: BitboardLayout = CLASSIC_LAYOUT,
+                           should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None):
+    """
+        Bitboard counterpart of `minimax_plain` (Minimax without pruning).
+    """
+    if should_stop is not None and should_stop():
+        raise SearchAborted
+    if stats is not None:
+        stats.enter_node(current_depth, (x_bits, o_bits))
+
+    score = evaluate_bitboard(x_bits, o_bits, layout)
+    if (score == layout.win_score or score == -layout.win_score or current_depth == depth_limit
+            or (x_bits | o_bits) == layout.full_mask):
+        return score
+
+    table_key = symmetry = None
+    if transposition_table is not None:
+        table_key, symmetry = _make_table_key(x_bits, o_bits, is_maximizing, depth_limit - current_depth, layout)
+        entry = transposition_table.probe(table_key)
+        if entry is not None and entry[0] == EXACT:
+            return entry[1]
+
+    if stats is not None:
+        stats.expanded_nodes += 1
+    best_index = -1
+    if is_maximizing:
+        best_score = float("-inf")
+        for index in get_candidate_bitboard_moves(x_bits, o_bits, layout):
+            value = minimax_plain_bitboard(x_bits | 1 << index, o_bits, current_depth + 1, False,
+                                           depth_limit, transposition_table, layout, should_stop, stats)
+            if value > best_score:
+                best_score, best_index = value, index
+    else:
+        best_score = float("inf")
+        for index in get_candidate_bitboard_moves(x_bits, o_bits, layout):
+            value = minimax_plain_bitboard(x_bits, o_bits | 1 << index, current_depth + 1, True,
+                                           depth_limit, transposition_table, layout, should_stop, stats)
+            if value < best_score:
+                best_score, best_index = value, index
+
+    if transposition_table is not None:
+        canonical_move = layout.symmetries[symmetry].index(best_index)
+        transposition_table.store(table_key, EXACT, best_score, canonical_move)
+
+    return best_score
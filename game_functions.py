@@ -1,61 +1,191 @@
-WINNING_LINES = \
-    (
-        (0, 1, 2),
-        (3, 4, 5),
-        (6, 7, 8),
-        (0, 3, 6),
-        (1, 4, 7),
-        (2, 5, 8),
-        (0, 4, 8),
-        (2, 4, 6),
-    )
+from functools import lru_cache
+from math import isqrt
+from operator import itemgetter
+
+DEFAULT_BOARD_SIZE = 3
+DEFAULT_WIN_LENGTH = 3
 
 BONUS = 11
 BONUS_SCALE = 1.0   # Will be reset each game
 
+CLASSIC_WIN_SCORE = 100
+NEIGHBOURHOOD_RADIUS = 1    # Larger boards only consider cells next to existing marks
+
+
+class SearchAborted(Exception):
+    """Raised inside a search when its `should_stop` callback asks it to stop early."""
+
+
+@lru_cache(maxsize=None)
+def get_winning_lines(board_size: int = DEFAULT_BOARD_SIZE,
+                      win_length: int = DEFAULT_WIN_LENGTH) -> tuple[tuple[int, ...], ...]:
+    """
+        Generate every line of `win_length` consecutive cells on a square board.
+
+            Lines are listed as rows, columns, down-right diagonals and down-left diagonals, which
+            for the classic 3×3 board reproduces the original hand-written table. The result is
+            cached per configuration.
+    """
+    directions = ((0, 1), (1, 0), (1, 1), (1, -1))
+    lines = []
+    for row_step, column_step in directions:
+        for row in range(board_size):
+            for column in range(board_size):
+                end_row = row + row_step * (win_length - 1)
+                end_column = column + column_step * (win_length - 1)
+                if 0 <= end_row < board_size and 0 <= end_column < board_size:
+                    lines.append(tuple((row + row_step * step) * board_size + column + column_step * step
+                                       for step in range(win_length)))
+
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def get_centre_cells(board_size: int = DEFAULT_BOARD_SIZE) -> tuple[int, ...]:
+    middle = (board_size - 1) // 2, board_size // 2
+    return tuple(sorted({row * board_size + column for row in middle for column in middle}))
+
+
+@lru_cache(maxsize=None)
+def get_win_score(board_size: int = DEFAULT_BOARD_SIZE, win_length: int = DEFAULT_WIN_LENGTH) -> int:
+    """
+        Return the terminal score for a configuration.
+
+            The classic board keeps its ±100. On larger boards the heuristic can exceed 100, so the
+            win score becomes the next multiple of 100 above the largest possible heuristic value.
+    """
+    lines = get_winning_lines(board_size, win_length)
+    if len(lines) <= len(WINNING_LINES):
+        return CLASSIC_WIN_SCORE
+
+    heuristic_bound = len(lines) * (1 + BONUS) + BONUS * len(get_centre_cells(board_size))
+    return CLASSIC_WIN_SCORE * (heuristic_bound // CLASSIC_WIN_SCORE + 1)
+
+
+@lru_cache(maxsize=None)
+def get_neighbourhoods(board_size: int) -> tuple[tuple[int, ...], ...]:
+    neighbourhoods = []
+    for index in range(board_size * board_size):
+        row, column = divmod(index, board_size)
+        neighbourhoods.append(tuple(
+            r * board_size + c
+            for r in range(max(0, row - NEIGHBOURHOOD_RADIUS), min(board_size, row + NEIGHBOURHOOD_RADIUS + 1))
+            for c in range(max(0, column - NEIGHBOURHOOD_RADIUS), min(board_size, column + NEIGHBOURHOOD_RADIUS + 1))
+            if (r, c) != (row, column)
+        ))
+
+    return tuple(neighbourhoods)
+
+
+@lru_cache(maxsize=None)
+def get_evaluation_tables(cell_count: int, win_length: int = DEFAULT_WIN_LENGTH) -> tuple:
+    """
+        Bundle everything `evaluate_board_state` needs for one configuration, keyed on the number
+        of cells so the board size does not have to be recomputed at every node.
+
+            Returns:
+                tuple: `(win_score, line_getters, centre_cells)`, where each line getter returns the
+                cells of one winning line as a tuple.
+    """
+    board_size = isqrt(cell_count)
+    line_getters = tuple(itemgetter(*line) for line in get_winning_lines(board_size, win_length))
+    return get_win_score(board_size, win_length), line_getters, get_centre_cells(board_size)
+
+
+WINNING_LINES = get_winning_lines(DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH)
+
+
+def get_board_size(board_state):
+    return isqrt(len(board_state))
+
 
 def has_moves_left(board_state):
     return "-" in board_state
 
 
-def evaluate_board_state(board_state):
-    for a, b, c in WINNING_LINES:   # Terminal win/loss first
-        symbol = board_state[a]
-        if symbol == board_state[b] == board_state[c] and symbol != "-":
-            return 100 if symbol == "X" else -100
+def get_candidate_moves(board_state):
+    """
+        List the empty cells worth searching, in index order.
+
+            On the classic board every empty cell is a candidate. On larger boards only cells
+            within `NEIGHBOURHOOD_RADIUS` of an existing mark are considered (or the centre on an
+            empty board), which keeps the branching factor manageable.
+    """
+    if len(board_state) <= DEFAULT_BOARD_SIZE ** 2:
+        return [i for i, symbol in enumerate(board_state) if symbol == "-"]
+
+    board_size = get_board_size(board_state)
+    neighbourhoods = get_neighbourhoods(board_size)
+    candidates = set()
+    for index, symbol in enumerate(board_state):
+        if symbol != "-":
+            candidates.update(cell for cell in neighbourhoods[index] if board_state[cell] == "-")
+    if not candidates:
+        candidates.update(cell for cell in get_centre_cells(board_size) if board_state[cell] == "-")
+
+    return sorted(candidates)
+
+
+def get_winner(board_state, win_length=DEFAULT_WIN_LENGTH):
+    for line in get_winning_lines(get_board_size(board_state), win_length):
+        symbol = board_state[line[0]]
+        if symbol != "-" and all(board_state[i] == symbol for i in line):
+            return symbol
+    return None
+
+
+def evaluate_board_state(board_state, win_length=DEFAULT_WIN_LENGTH):
+    win_score, line_getters, centre_cells = get_evaluation_tables(len(board_state), win_length)
 
     open_lines_max = open_lines_min = 0
     two_in_row_max = two_in_row_min = 0
 
-    for a, b, c in WINNING_LINES:
-        line = (board_state[a], board_state[b], board_state[c])
-        if "O" not in line:  # Still winnable for X
+    for line_getter in line_getters:
+        cells = line_getter(board_state)
+        x_count = cells.count("X")
+        o_count = cells.count("O")
+        if x_count == win_length:   # Terminal win/loss, first winning line decides
+            return win_score
+        if o_count == win_length:
+            return -win_score
+        if not o_count:  # Still winnable for X
             open_lines_max += 1
-            if line.count("X") == 2:
+            if x_count == win_length - 1:
                 two_in_row_max += 1
-        if "X" not in line:  # Still winnable for O
+        if not x_count:  # Still winnable for O
             open_lines_min += 1
-            if line.count("O") == 2:
+            if o_count == win_length - 1:
                 two_in_row_min += 1
 
     line_term = BONUS_SCALE * (open_lines_max - open_lines_min)
     threat_term = BONUS_SCALE ** 2 * BONUS * (two_in_row_max - two_in_row_min)
 
-    centre_term = 0
-    if board_state[4] == "X":
-        centre_term = BONUS_SCALE ** 2 * BONUS
-    elif board_state[4] == "O":
-        centre_term = -BONUS_SCALE ** 2 * BONUS
+    centre_balance = 0
+    for index in centre_cells:
+        if board_state[index] == "X":
+            centre_balance += 1
+        elif board_state[index] == "O":
+            centre_balance -= 1
+    centre_term = BONUS_SCALE ** 2 * BONUS * centre_balance if centre_balance else 0
 
     return line_term + threat_term + centre_term
 
-def get_ordered_moves(board_state, player):
+def get_ordered_moves(board_state, player, win_length=DEFAULT_WIN_LENGTH):
     candidates = []
-    for i in range(len(board_state)):
-        if board_state[i] == "-":
-            board_state[i] = player
-            score = evaluate_board_state(board_state)
-            board_state[i] = "-"
-            candidates.append((i, score))
+    for i in get_candidate_moves(board_state):
+        board_state[i] = player
+        score = evaluate_board_state(board_state, win_length)
+        board_state[i] = "-"
+        candidates.append((i, score))
 
     return [i for i, _ in sorted(candidates, key=lambda pair: pair[1], reverse=(player == "X"))]    # For X (maximizer), sort descending; for O (minimizer), ascending
+
+
+def promote_move(moves, move):
+    """
+        Return `moves` with `move` tried first (e.g. the best move remembered by a transposition
+        table), leaving the order of the remaining moves unchanged.
+    """
+    if move < 0 or move not in moves:
+        return moves
+    return (move,) + tuple(other for other in moves if other != move)
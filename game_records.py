@@ -0,0 +1,78 @@
+import gzip
+import json
+import os
+from typing import Iterator
+
+GAME_RECORDS_FILENAME = "game_records.jsonl"
+GAME_RECORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), GAME_RECORDS_FILENAME)
+RECORD_VERSION = 1
+
+
+def _open_records(path: str, mode: str):
+    # A ".gz" file is a series of gzip members, one per append, which gzip reads back as one stream
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def make_game_record(board_size: int, win_length: int, human_symbol: str, result: str | None, moves: list[int],
+                     engine_ms: list[float | None], **settings) -> dict:
+    """
+        Build the record of a finished game.
+
+            Args:
+                board_size (int): The side length of the board.
+                win_length (int): The number of marks in a row needed to win.
+                human_symbol (str): The symbol the human played ("X" or "O").
+                result (str | None): The winning symbol, or None for a draw.
+                moves (list[int]): The cells played, in order. X always moves first.
+                engine_ms (list[float | None]): Per move, the milliseconds the engine searched for it,
+                or None for the human's moves.
+                **settings: The other settings in use (algorithm, difficulty, ...), stored as given.
+
+            Returns:
+                dict: The record, as written by `append_game_record`.
+    """
+    return {
+        "version": RECORD_VERSION,
+        "board_size": board_size,
+        "win_length": win_length,
+        "human": human_symbol,
+        **settings,
+        "result": result or "draw",
+        "moves": list(moves),
+        "engine_ms": [None if ms is None else round(ms, 2) for ms in engine_ms],
+    }
+
+
+def append_game_record(path: str, record: dict):
+    """
+        Append one record to a record file: one compact JSON line per game, gzip-compressed if the
+        path ends in ".gz". Existing records are never rewritten.
+    """
+    with _open_records(path, "a") as stream:
+        stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def iter_game_records(path: str) -> Iterator[tuple[int, dict]]:
+    """
+        Stream the records of a record file, one line at a time, so files of any size are read in
+        constant memory.
+
+            Lines that are not records (e.g. the last line of a file whose writer was killed) are
+            skipped, and a truncated gzip file is read up to the cut.
+
+            Returns:
+                Iterator[tuple[int, dict]]: `(line_number, record)` pairs, line numbers starting at 1.
+    """
+    with _open_records(path, "r") as stream:
+        try:
+            for line_number, line in enumerate(stream, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and isinstance(record.get("moves"), list):
+                    yield line_number, record
+        except EOFError:
+            return  # A gzip member cut off mid-write ends the file
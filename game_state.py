@@ -0,0 +1,273 @@
+import random
+from functools import lru_cache
+
+from batch_evaluation import get_ordered_moves_batch
+
+from game_functions import (BONUS, BONUS_SCALE, DEFAULT_WIN_LENGTH, evaluate_board_state, get_board_size,
+                            get_candidate_moves, get_centre_cells, get_win_score, get_winner, get_winning_lines)
+from transposition_table import get_board_symmetries
+
+LINE_TERM = BONUS_SCALE
+THREAT_TERM = BONUS_SCALE ** 2 * BONUS
+CENTRE_TERM = BONUS_SCALE ** 2 * BONUS
+
+ZOBRIST_SEED = 20240601     # Fixed, so hashes are the same in every process and every run
+
+
+@lru_cache(maxsize=None)
+def get_cell_lines(board_size: int, win_length: int = DEFAULT_WIN_LENGTH) -> tuple[tuple[int, ...], ...]:
+    """
+        For every cell, list the indexes (into `get_winning_lines`) of the lines passing through it.
+    """
+    cell_lines = [[] for _ in range(board_size * board_size)]
+    for line_index, line in enumerate(get_winning_lines(board_size, win_length)):
+        for cell in line:
+            cell_lines[cell].append(line_index)
+
+    return tuple(tuple(lines) for lines in cell_lines)
+
+
+def _line_terms(x_count: int, o_count: int, win_length: int) -> tuple[int, int, int, int]:
+    # What one line adds to (open balance, threat balance, X wins, O wins), following `evaluate_board_state`
+    open_balance = threat_balance = 0
+    if not o_count:
+        open_balance += 1
+        if x_count == win_length - 1:
+            threat_balance += 1
+    if not x_count:
+        open_balance -= 1
+        if o_count == win_length - 1:
+            threat_balance -= 1
+
+    return open_balance, threat_balance, int(x_count == win_length), int(o_count == win_length)
+
+
+@lru_cache(maxsize=None)
+def get_move_deltas(win_length: int = DEFAULT_WIN_LENGTH) -> tuple[tuple, tuple]:
+    """
+        Precompute how adding one mark to a line changes its contribution to the evaluation.
+
+            Returns:
+                tuple[tuple, tuple]: `(x_deltas, o_deltas)`, where `x_deltas[x][o]` is the change of
+                `(open balance, threat balance, X wins, O wins)` when an X is added to a line that
+                holds `x` X marks and `o` O marks. `o_deltas[o][x]` is the same for an added O, so
+                both tables are indexed by the mover's count first.
+    """
+    def delta(before, after):
+        return tuple(new - old for old, new in zip(before, after))
+
+    x_deltas = tuple(tuple(delta(_line_terms(x, o, win_length), _line_terms(x + 1, o, win_length))
+                           for o in range(win_length + 1)) for x in range(win_length))
+    o_deltas = tuple(tuple(delta(_line_terms(x, o, win_length), _line_terms(x, o + 1, win_length))
+                           for x in range(win_length + 1)) for o in range(win_length))
+    return x_deltas, o_deltas
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(board_size: int) -> tuple[tuple, tuple]:
+    """
+        Generate the Zobrist keys of a board size, one random 64-bit key per cell and mark.
+
+            Each key is listed once per board symmetry (`get_board_symmetries` order): entry `s` is
+            the key of the cell the mark lands on when the board is transformed by symmetry `s`.
+            XOR-ing them over the marks of a board gives the hash of all 8 transformed boards at once,
+            and the smallest of those identifies the position up to symmetry.
+
+            Returns:
+                tuple[tuple, tuple]: `(x_keys, o_keys)`, where `x_keys[cell][s]` is the key of an X on
+                `cell` under symmetry `s`.
+    """
+    rng = random.Random(ZOBRIST_SEED + board_size)
+    cell_count = board_size * board_size
+    base_x = [rng.getrandbits(64) for _ in range(cell_count)]
+    base_o = [rng.getrandbits(64) for _ in range(cell_count)]
+    # The transformed board holds `board[p[i]]` at `i`, so a mark on `cell` lands on `p.index(cell)`
+    landing = [{cell: i for i, cell in enumerate(permutation)} for permutation in get_board_symmetries(board_size)]
+    x_keys = tuple(tuple(base_x[cells[cell]] for cells in landing) for cell in range(cell_count))
+    o_keys = tuple(tuple(base_o[cells[cell]] for cells in landing) for cell in range(cell_count))
+    return x_keys, o_keys
+
+
+class GameState:
+    """
+        A board together with incrementally maintained evaluation terms, hashes and move history.
+
+            The per-line X/O counts, the open-line and threat balances, the number of completed lines
+            for each side and the centre balance are updated by `make_move` and `unmake_move`, so only
+            the lines through the changed cell are touched. `evaluate` then returns exactly what
+            `evaluate_board_state` would for the same board, without rescanning it, and `winner` and
+            `is_terminal` come straight from the completed-line counts.
+
+            The Zobrist hashes of the board under all 8 symmetries are updated the same way (see
+            `get_zobrist_keys`): `zobrist_hash` identifies the exact board and `canonical_hash` the
+            position up to symmetry, which is what `TranspositionTable.make_state_key` keys on.
+            Moves are kept on the `history` stack; `undo_move` takes back the last one.
+
+            The state works on the list it is given: `make_move` writes into `board`, and
+            `unmake_move` restores it. With `batch_ordering`, `ordered_moves` scores all children
+            in one NumPy call (`get_ordered_moves_batch`) instead of making each move in turn.
+    """
+
+    __slots__ = ("board", "win_length", "batch_ordering", "win_score", "cell_lines", "centre_cells",
+                 "x_deltas", "o_deltas", "x_counts", "o_counts", "open_balance", "threat_balance", "x_wins",
+                 "o_wins", "centre_balance", "empty_count", "symmetries", "x_keys", "o_keys", "hashes", "history")
+
+    def __init__(self, board_state: list[str], win_length: int = DEFAULT_WIN_LENGTH, batch_ordering: bool = False):
+        board_size = get_board_size(board_state)
+        self.board = board_state
+        self.win_length = win_length
+        self.batch_ordering = batch_ordering
+        self.win_score = get_win_score(board_size, win_length)
+        self.cell_lines = get_cell_lines(board_size, win_length)
+        self.centre_cells = frozenset(get_centre_cells(board_size))
+        self.x_deltas, self.o_deltas = get_move_deltas(win_length)
+
+        lines = get_winning_lines(board_size, win_length)
+        self.x_counts = [sum(board_state[cell] == "X" for cell in line) for line in lines]
+        self.o_counts = [sum(board_state[cell] == "O" for cell in line) for line in lines]
+        self.open_balance = self.threat_balance = self.x_wins = self.o_wins = 0
+        for x_count, o_count in zip(self.x_counts, self.o_counts):
+            open_balance, threat_balance, x_win, o_win = _line_terms(x_count, o_count, win_length)
+            self.open_balance += open_balance
+            self.threat_balance += threat_balance
+            self.x_wins += x_win
+            self.o_wins += o_win
+        self.centre_balance = (sum(board_state[cell] == "X" for cell in self.centre_cells)
+                               - sum(board_state[cell] == "O" for cell in self.centre_cells))
+        self.empty_count = board_state.count("-")
+
+        self.symmetries = get_board_symmetries(board_size)
+        self.x_keys, self.o_keys = get_zobrist_keys(board_size)
+        self.hashes = [0] * len(self.symmetries)
+        for index, symbol in enumerate(board_state):
+            if symbol != "-":
+                self._toggle_hashes(index, symbol)
+        self.history = []
+
+    def has_moves_left(self) -> bool:
+        return self.empty_count > 0
+
+    @property
+    def winner(self) -> str | None:
+        """The symbol that completed a line, or None, as `get_winner` would return."""
+        if self.x_wins:
+            if self.o_wins:     # Both sides completed a line; the first one in line order decides
+                return get_winner(self.board, self.win_length)
+            return "X"
+        return "O" if self.o_wins else None
+
+    @property
+    def is_terminal(self) -> bool:
+        return bool(self.x_wins or self.o_wins or not self.empty_count)
+
+    @property
+    def zobrist_hash(self) -> int:
+        return self.hashes[0]   # The identity symmetry comes first
+
+    def canonical_hash(self) -> tuple[int, tuple[int, ...]]:
+        """
+            The hash of the position up to symmetry and the permutation that produced it, with the
+            same meaning as in `canonical_board_key`: `permutation[canonical_index]` is the matching
+            index on `board`.
+        """
+        hashes = self.hashes
+        canonical = min(hashes)
+        return canonical, self.symmetries[hashes.index(canonical)]
+
+    def make_move(self, index: int, symbol: str):
+        self.board[index] = symbol
+        self.empty_count -= 1
+        self.history.append(index)
+        self._apply(index, symbol, 1)
+        self._toggle_hashes(index, symbol)
+
+    def unmake_move(self, index: int):
+        symbol = self.board[index]
+        self._apply(index, symbol, -1)
+        self._toggle_hashes(index, symbol)
+        self.board[index] = "-"
+        self.empty_count += 1
+        self.history.pop()
+
+    def make_scratch_move(self, index: int, symbol: str):
+        """
+            `make_move` without the hashes and the history, for moves that are taken back before
+            anything looks at them (move ordering, random playouts). Undo with `unmake_scratch_move`.
+        """
+        self.board[index] = symbol
+        self.empty_count -= 1
+        self._apply(index, symbol, 1)
+
+    def unmake_scratch_move(self, index: int):
+        self._apply(index, self.board[index], -1)
+        self.board[index] = "-"
+        self.empty_count += 1
+
+    def undo_move(self) -> int:
+        """Take back the last move and return its index."""
+        index = self.history[-1]
+        self.unmake_move(index)
+        return index
+
+    def _toggle_hashes(self, index: int, symbol: str):
+        keys = (self.x_keys if symbol == "X" else self.o_keys)[index]
+        self.hashes = [hash_value ^ key for hash_value, key in zip(self.hashes, keys)]
+
+    def _apply(self, index: int, symbol: str, sign: int):
+        open_balance = threat_balance = x_wins = o_wins = 0
+        if symbol == "X":
+            counts, other_counts, deltas = self.x_counts, self.o_counts, self.x_deltas
+            if index in self.centre_cells:
+                self.centre_balance += sign
+        else:
+            counts, other_counts, deltas = self.o_counts, self.x_counts, self.o_deltas
+            if index in self.centre_cells:
+                self.centre_balance -= sign
+
+        for line in self.cell_lines[index]:
+            if sign < 0:
+                counts[line] -= 1
+            delta = deltas[counts[line]][other_counts[line]]
+            open_balance += delta[0]
+            threat_balance += delta[1]
+            x_wins += delta[2]
+            o_wins += delta[3]
+            if sign > 0:
+                counts[line] += 1
+
+        self.open_balance += sign * open_balance
+        self.threat_balance += sign * threat_balance
+        self.x_wins += sign * x_wins
+        self.o_wins += sign * o_wins
+
+    def evaluate(self):
+        """
+            Score the position from X's perspective, identical to `evaluate_board_state`.
+        """
+        if self.x_wins:
+            if self.o_wins:     # Both sides completed a line; the first one in line order decides
+                return evaluate_board_state(self.board, self.win_length)
+            return self.win_score
+        if self.o_wins:
+            return -self.win_score
+
+        line_term = LINE_TERM * self.open_balance
+        threat_term = THREAT_TERM * self.threat_balance
+        centre_term = CENTRE_TERM * self.centre_balance if self.centre_balance else 0
+        return line_term + threat_term + centre_term
+
+    def ordered_moves(self, player: str) -> list[int]:
+        """
+            Incremental counterpart of `get_ordered_moves`: the candidate moves sorted by the score
+            of the resulting position, best first for `player`.
+        """
+        if self.batch_ordering:
+            return get_ordered_moves_batch(self.board, player, self.win_length)
+
+        candidates = []
+        for i in get_candidate_moves(self.board):
+            self.make_scratch_move(i, player)
+            candidates.append((i, self.evaluate()))
+            self.unmake_scratch_move(i)
+
+        return [i for i, _ in sorted(candidates, key=lambda pair: pair[1], reverse=(player == "X"))]
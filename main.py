@@ -1,13 +1,26 @@
 import os, sys
+import queue
+import threading
+from functools import partial
+from typing import NamedTuple
 
 import tkinter as tk
 import customtkinter as ctk
 
 from tkinter import messagebox
-from customtkinter import CTk, CTkFrame, CTkButton, CTkRadioButton, CTkLabel, CTkOptionMenu
+from customtkinter import CTk, CTkFrame, CTkButton, CTkRadioButton, CTkLabel, CTkOptionMenu, CTkProgressBar, CTkSwitch
 
-from algorithm_functions import compute_best_move, compute_best_move_plain, has_moves_left
-from game_functions import WINNING_LINES, BONUS_SCALE
+from algorithm_functions import (compute_best_move, compute_best_move_budgeted, compute_best_move_plain,
+                                 compute_best_move_timed, get_skill_level)
+from game_functions import BONUS_SCALE, DEFAULT_BOARD_SIZE, DEFAULT_WIN_LENGTH, SearchAborted
+from game_records import GAME_RECORDS_PATH, append_game_record, make_game_record
+from game_state import GameState
+from mcts_search import MCTSTree, compute_best_move_mcts
+from negamax_functions import compute_best_move_negamax
+from pondering import Ponderer
+from solution_table import SOLUTION_TABLE_FILENAME, compute_best_move_from_table, load_solution_table
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
 
 
 # Initialize dark theme
@@ -15,7 +28,39 @@ ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("dark-blue")
 
 DIFFICULTY_OPTIONS = tuple(range(1, 10))
+# Board label → (board size, win length, deepest search that stays responsive on that board, and the same for
+# plain Minimax, which has neither pruning nor a time budget)
+BOARD_OPTIONS = {
+    "3×3, 3 in a row": (3, 3, 8, 8),
+    "4×4, 4 in a row": (4, 4, 8, 4),
+    "5×5, 4 in a row": (5, 4, 6, 3),
+    "7×7, 5 in a row": (7, 5, 3, 2),
+}
+BOARD_PIXELS = 480
+AI_TIME_BUDGET_MS = 1000    # Alpha-Beta and Negamax on larger boards deepen until this budget runs out; also caps MCTS
+AI_POLL_INTERVAL_MS = 50    # How often the Tk loop checks for a finished background search
 SCALE = BONUS_SCALE
+TABLE_ALGORITHMS = ("Minimax", "Alpha-Beta")   # The solution table holds exactly their scores
+
+
+class SearchSettings(NamedTuple):
+    """
+        What an AI search needs from the GUI, read on the Tk thread when the search starts.
+
+            Worker threads get this snapshot instead of reading Tk variables: a Tk call from another
+            thread waits for the main loop, which deadlocks if the main loop is waiting for them.
+            The game's transposition table and MCTS tree are included so that a cancelled search
+            of a previous game never touches the new game's.
+    """
+    algorithm: str
+    difficulty: int
+    board_size: int
+    win_length: int
+    depth_cap: int
+    minimax_depth_cap: int
+    transposition_table: TranspositionTable
+    mcts_tree: MCTSTree
+
 
 ICON_FILENAME = r"red-x-sign-symbol-icon-letter-x-sign-no-sign-design-transparent-background-free-png"
 
@@ -54,8 +99,25 @@ class TicTacToeApp:
         self.current_turn = None
         self.symbol_choice = tk.StringVar(value="X")
         self.algorithm_variable = tk.StringVar(value="Minimax")
+        self.board_variable = tk.StringVar(value=next(iter(BOARD_OPTIONS)))
+        self.debug_variable = tk.BooleanVar(value=False)   # Show search statistics under the board
+        self.last_search_stats = None
+        self.board_size = DEFAULT_BOARD_SIZE
+        self.win_length = DEFAULT_WIN_LENGTH
+        self.depth_cap = DIFFICULTY_OPTIONS[-1] - 1
+        self.minimax_depth_cap = self.depth_cap
         self.max_search_depth = DIFFICULTY_OPTIONS[0]
         self.difficulty_variable = tk.StringVar(value=str(self.max_search_depth))
+        self.transposition_table = TranspositionTable()
+        self.mcts_tree = MCTSTree()
+        self.solution_table = load_solution_table(resource_path(SOLUTION_TABLE_FILENAME))  # None until generated
+        # Background AI search: results come back through the queue, tagged with the game generation
+        self.ai_results = queue.Queue()
+        self.ai_cancel_event = threading.Event()
+        self.search_generation = 0
+        # Pondering: search the AI's answers to likely human replies during the human's turn
+        self.ponder_variable = tk.BooleanVar(value=False)
+        self.ponderer = Ponderer()
         self._setup_selection_panel()
 
     def _setup_selection_panel(self):
@@ -78,10 +140,19 @@ class TicTacToeApp:
         algorithm_label.pack(pady=15, padx=30, anchor="w")
 
         algorithm_menu = CTkOptionMenu(self.selection_frame, variable=self.algorithm_variable,
-                                       values=("Minimax", "Alpha-Beta"), width=500, height=45,
+                                       values=("Minimax", "Alpha-Beta", "Negamax", "MCTS"), width=500, height=45,
                                        font=("Arial", 20), dropdown_font=("Arial", 20))
         algorithm_menu.pack(pady=5, padx=30, anchor="w")
 
+        # Board selector
+        board_label = CTkLabel(self.selection_frame, text="Board:", font=("Arial", 30))
+        board_label.pack(pady=15, padx=30, anchor="w")
+
+        board_menu = CTkOptionMenu(self.selection_frame, variable=self.board_variable,
+                                   values=tuple(BOARD_OPTIONS), width=500, height=45,
+                                   font=("Arial", 20), dropdown_font=("Arial", 20))
+        board_menu.pack(pady=5, padx=30, anchor="w")
+
         # Difficulty selector
         difficulty_label = CTkLabel(self.selection_frame, text="Difficulty:", font=("Arial", 30))
         difficulty_label.pack(pady=15, padx=30, anchor="w")
@@ -99,14 +170,20 @@ class TicTacToeApp:
         self.max_search_depth = int(self.difficulty_variable.get())
         global SCALE
         SCALE = self.max_search_depth / 9
+        self.board_size, self.win_length, self.depth_cap, self.minimax_depth_cap = (
+            BOARD_OPTIONS[self.board_variable.get()])
         self.human_symbol = self.symbol_choice.get()
         self.ai_symbol = "O" if self.human_symbol == "X" else "X"
         self.current_turn = "X"
+        self.transposition_table = TranspositionTable()   # Positions are shared across the moves of one game
+        self.mcts_tree = MCTSTree()     # Likewise the MCTS tree, re-rooted after every move
         self.selection_frame.destroy()
         self._setup_game_panel()
 
         if self.current_turn == self.ai_symbol:
-            self.master.after(100, self._execute_ai_move)
+            self.master.after(100, self._execute_ai_move, self.search_generation)
+        else:
+            self._start_pondering()
 
     def _setup_game_panel(self):
         self.control_frame = CTkFrame(self.master)  # dark‐mode frame
@@ -116,16 +193,35 @@ class TicTacToeApp:
                                    command=self._reset_to_selection)
         restart_button.pack(side="left", padx=10)
 
+        self.thinking_bar = CTkProgressBar(self.control_frame, mode="indeterminate", width=200)
+        self.thinking_bar.set(0)
+        self.thinking_bar.pack(side="left", padx=10)
+
+        debug_switch = CTkSwitch(self.control_frame, text="Debug", variable=self.debug_variable,
+                                 command=self._update_debug_overlay)
+        debug_switch.pack(side="left", padx=10)
+
+        ponder_switch = CTkSwitch(self.control_frame, text="Ponder", variable=self.ponder_variable,
+                                  command=self._on_ponder_toggled)
+        ponder_switch.pack(side="left", padx=10)
+
         self.board_frame = CTkFrame(self.master)
         self.board_frame.pack(expand=True)
 
+        self.debug_label = CTkLabel(self.master, text="", justify="left", anchor="w", font=("Courier", 14))
+        self.last_search_stats = None
+        self._update_debug_overlay()
+
         self.cell_buttons = []
-        self.game_board = ["-" for _ in range(9)]
+        self.game_state = GameState(["-"] * (self.board_size * self.board_size), self.win_length)
+        self.engine_ms = []     # Per move of `game_state.history`: the engine's search time, None for the human
 
-        for index in range(9):
-            button = CTkButton(self.board_frame, text="", width=150, height=150, font=("Arial", 120),
+        cell_pixels = BOARD_PIXELS // self.board_size
+        for index in range(self.board_size * self.board_size):
+            button = CTkButton(self.board_frame, text="", width=cell_pixels, height=cell_pixels,
+                               font=("Arial", cell_pixels * 4 // 5),
                                command=lambda i=index: self._on_cell_clicked(i))
-            button.grid(row=index // 3, column=index % 3, padx=5, pady=5)
+            button.grid(row=index // self.board_size, column=index % self.board_size, padx=5, pady=5)
             self.cell_buttons.append(button)
 
         self._update_board_ui()
@@ -134,39 +230,164 @@ class TicTacToeApp:
         self.max_search_depth = int(self.difficulty_variable.get())
 
     def _reset_to_selection(self):
+        # Abandon any in-flight search so its move never lands on the next board
+        self.ai_cancel_event.set()
+        self.ponderer.stop()
+        self.search_generation += 1
         self.control_frame.destroy()
         self.board_frame.destroy()
+        self.debug_label.destroy()
         self._setup_selection_panel()
 
     def _on_cell_clicked(self, index):
-        if self.current_turn == self.human_symbol and self.game_board[index] == "-":
-            self.game_board[index] = self.human_symbol
+        if self.current_turn == self.human_symbol and self.game_state.board[index] == "-":
+            self.ponderer.stop()
+            self.game_state.make_move(index, self.human_symbol)
+            self.engine_ms.append(None)
             self._update_board_ui()
             if self._check_for_end():
                 return
             self.current_turn = self.ai_symbol
-            self.master.after(100, self._execute_ai_move)
+            pondered = self.ponderer.take(self.game_state)
+            if pondered is not None:
+                self._apply_ai_move(*pondered)  # Predicted reply: the answer is already known
+                return
+            self.master.after(100, self._execute_ai_move, self.search_generation)
 
-    def _execute_ai_move(self):
-        depth = self.max_search_depth - 1  # Level 1 ⇒ depth 0 search
+    def _on_ponder_toggled(self):
+        if self.ponder_variable.get():
+            if self.current_turn == self.human_symbol:
+                self._start_pondering()
+        else:
+            self.ponderer.stop()
+
+    def _start_pondering(self):
+        # Not with MCTS: pondering would re-root the game's tree at guessed replies and lose the tree reuse
+        if self.ponder_variable.get() and self.algorithm_variable.get() != "MCTS":
+            search = partial(self._search_move, self._read_search_settings())
+            self.ponderer.start(search, self.game_state.board, self.human_symbol, self.ai_symbol, self.win_length)
+
+    def _execute_ai_move(self, generation):
+        if generation != self.search_generation:
+            return  # The game was restarted before the search began
+
+        self.ai_cancel_event = threading.Event()
+        self.thinking_bar.start()
+        worker = threading.Thread(target=self._run_ai_search,
+                                  args=(generation, self._read_search_settings(), list(self.game_state.board),
+                                        self.current_turn, self.ai_cancel_event),
+                                  daemon=True)
+        worker.start()
+        self.master.after(AI_POLL_INTERVAL_MS, self._poll_ai_result, generation, worker)
+
+    def _read_search_settings(self):
+        # Tk thread only
+        return SearchSettings(self.algorithm_variable.get(), self.max_search_depth, self.board_size,
+                              self.win_length, self.depth_cap, self.minimax_depth_cap, self.transposition_table,
+                              self.mcts_tree)
+
+    def _run_ai_search(self, generation, settings, board_state, player_symbol, cancel_event):
+        # Runs on a worker thread: it must not touch any Tk widget or variable
+        self.ponderer.wait()    # Pondering was stopped; let it leave the shared table and tree first
+        stats = SearchStats()
+        try:
+            best_index = self._search_move(settings, board_state, player_symbol, cancel_event.is_set, stats)
+        except SearchAborted:
+            return
+        except Exception as error:
+            self.ai_results.put((generation, error, stats))   # Reported and the game reset on the Tk thread
+            return
+        self.ai_results.put((generation, best_index, stats))
+
+    def _search_move(self, settings, board_state, player_symbol, should_stop, stats):
+        # Runs on a worker thread; everything it needs from the GUI is in `settings`
+        depth = settings.difficulty - 1  # Level 1 ⇒ depth 0 search
         if depth < 0:
             depth = 0  # Safety change
+        depth = min(depth, settings.depth_cap)
+
+        if settings.algorithm == "Alpha-Beta" and get_skill_level(settings.difficulty).node_budget is not None:
+            # Easy levels: a small node budget and a controlled error model instead of a full search
+            return compute_best_move_budgeted(board_state, player_symbol, depth, settings.difficulty,
+                                              settings.transposition_table, use_bitboard=True,
+                                              win_length=settings.win_length, should_stop=should_stop, stats=stats)
+        if (self.solution_table is not None and settings.board_size == DEFAULT_BOARD_SIZE
+                and settings.algorithm in TABLE_ALGORITHMS):
+            return compute_best_move_from_table(board_state, player_symbol, depth, settings.difficulty,
+                                                self.solution_table, stats, settings.win_length, should_stop)
+        if settings.algorithm == "MCTS":
+            return compute_best_move_mcts(board_state, player_symbol, settings.difficulty, settings.win_length,
+                                          time_budget_ms=AI_TIME_BUDGET_MS, tree=settings.mcts_tree,
+                                          should_stop=should_stop, stats=stats)
+        if settings.algorithm == "Negamax":
+            # Iterative deepening: on larger boards it stops at the time budget, like Alpha-Beta
+            time_budget_ms = AI_TIME_BUDGET_MS if settings.board_size > DEFAULT_BOARD_SIZE else None
+            return compute_best_move_negamax(board_state, player_symbol, depth, settings.difficulty,
+                                             settings.transposition_table,
+                                             win_length=settings.win_length, time_budget_ms=time_budget_ms,
+                                             should_stop=should_stop, stats=stats)
+        if settings.board_size > DEFAULT_BOARD_SIZE and settings.algorithm == "Alpha-Beta":
+            return compute_best_move_timed(board_state, player_symbol, AI_TIME_BUDGET_MS,
+                                           settings.difficulty, settings.transposition_table, use_bitboard=True,
+                                           win_length=settings.win_length, max_depth=depth,
+                                           should_stop=should_stop, stats=stats)
+        if settings.algorithm == "Minimax":
+            return compute_best_move_plain(board_state, player_symbol, min(depth, settings.minimax_depth_cap),
+                                           settings.difficulty,
+                                           settings.transposition_table, use_bitboard=True,
+                                           win_length=settings.win_length, should_stop=should_stop, stats=stats)
+        return compute_best_move(board_state, player_symbol, depth, settings.difficulty,
+                                 settings.transposition_table, use_bitboard=True,
+                                 win_length=settings.win_length, should_stop=should_stop, stats=stats)
+
+    def _poll_ai_result(self, generation, worker):
+        if generation != self.search_generation:
+            return  # Restarted; the cancelled worker posts nothing
+        try:
+            result_generation, best_index, stats = self.ai_results.get_nowait()
+        except queue.Empty:
+            self.master.after(AI_POLL_INTERVAL_MS, self._poll_ai_result, generation, worker)
+            return
+        if result_generation != generation:
+            self.master.after(AI_POLL_INTERVAL_MS, self._poll_ai_result, generation, worker)
+            return  # Stale move from a game that has been restarted
+
+        self.thinking_bar.stop()
+        self.thinking_bar.set(0)
+        if isinstance(best_index, Exception):
+            messagebox.showerror("AI error", f"The AI search failed: {best_index!r}")
+            self._reset_to_selection()
+            return
+        self._apply_ai_move(best_index, stats)
 
-        if self.algorithm_variable.get() == "Minimax":
-            best_index = compute_best_move_plain(self.game_board, self.current_turn, depth, self.max_search_depth)
-        else:
-            best_index = compute_best_move(self.game_board, self.current_turn, depth, self.max_search_depth)
-
+    def _apply_ai_move(self, best_index, stats):
+        self.last_search_stats = stats
+        self._update_debug_overlay()
         if best_index != -1:
-            self.game_board[best_index] = self.current_turn
+            self.game_state.make_move(best_index, self.current_turn)
+            self.engine_ms.append(1000 * stats.elapsed_seconds)
             self._update_board_ui()
             if self._check_for_end():
                 return
             self.current_turn = self.human_symbol
+            self._start_pondering()
+
+    def _update_debug_overlay(self):
+        if not self.debug_variable.get():
+            self.debug_label.pack_forget()
+            return
+        if self.last_search_stats is None:
+            text = "No AI move yet"
+        elif not self.last_search_stats.nodes and self.last_search_stats.candidates:
+            text = "Looked up in the solution table\n" + self.last_search_stats.format_summary()
+        else:
+            text = self.last_search_stats.format_summary()
+        self.debug_label.configure(text=text)
+        self.debug_label.pack(pady=10, padx=10, fill="x")
 
     def _update_board_ui(self):
         for i, button in enumerate(self.cell_buttons):
-            symbol = self.game_board[i]
+            symbol = self.game_state.board[i]
             if symbol == "-":
                 button.configure(text="", state="normal")
             else:
@@ -175,20 +396,32 @@ class TicTacToeApp:
     def _check_for_end(self):
         winner = self._determine_winner()
         if winner:
+            self._record_game(winner)
             messagebox.showinfo("Game Over", f"{winner} wins!")
             self._reset_to_selection()
             return True
-        if not has_moves_left(self.game_board):
+        if not self.game_state.has_moves_left():
+            self._record_game(None)
             messagebox.showinfo("Game Over", "It’s a tie!")
             self._reset_to_selection()
             return True
         return False
 
     def _determine_winner(self):
-        for a, b, c in WINNING_LINES:
-            if self.game_board[a] == self.game_board[b] == self.game_board[c] != "-":
-                return self.game_board[a]
-        return None
+        return self.game_state.winner
+
+    def _record_game(self, winner):
+        # Append the finished game to the record stream read by analyze_records.py
+        record = make_game_record(self.board_size, self.win_length, self.human_symbol, winner,
+                                  self.game_state.history, self.engine_ms,
+                                  algorithm=self.algorithm_variable.get(), difficulty=self.max_search_depth,
+                                  depth_cap=self.depth_cap, ponder=self.ponder_variable.get(),
+                                  solution_table=self.solution_table is not None
+                                  and self.board_size == DEFAULT_BOARD_SIZE)
+        try:
+            append_game_record(GAME_RECORDS_PATH, record)
+        except OSError:
+            pass  # Recording is best effort; never interrupt the game over it
 
 
 if __name__ == "__main__":
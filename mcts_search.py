@@ -0,0 +1,346 @@
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from time import perf_counter
+from typing import Callable
+
+from algorithm_functions import choose_move_with_noise
+from game_functions import DEFAULT_WIN_LENGTH, SearchAborted
+from game_state import GameState
+from search_stats import SearchStats
+
+EXPLORATION = sqrt(2)           # UCT exploration constant
+PLAYOUTS_PER_LEVEL = 200        # Difficulty d gets PLAYOUTS_PER_LEVEL * d² playouts by default
+DETERMINISTIC_DIFFICULTY = 5    # From this level on the most visited move is always played
+
+# Per-process state of the pool workers
+_worker_tree = None
+_worker_reported = None
+
+
+def get_playout_budget(difficulty: int) -> int:
+    """
+        Map a difficulty level (1-9) onto a playout budget.
+
+            The budget grows with the square of the level, from `PLAYOUTS_PER_LEVEL` at level 1 to
+            81 times that at level 9, much as a deeper look-ahead costs more for the Minimax engines.
+    """
+    return PLAYOUTS_PER_LEVEL * max(difficulty, 1) ** 2
+
+
+def _other(symbol: str) -> str:
+    return "O" if symbol == "X" else "X"
+
+
+class _Node:
+    # One position of the search tree, reached by `mover` playing `move`
+    def __init__(self, move: int, mover: str, parent, state: GameState):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.value = 0.0    # Sum of playout results for `mover`: 1 for a win, 0.5 for a draw
+        if state.x_wins or state.o_wins:
+            self.outcome = 1.0          # Only the player who just moved can have completed a line
+            self.untried = []
+        elif not state.empty_count:
+            self.outcome = 0.5
+            self.untried = []
+        else:
+            self.outcome = None
+            # Best static move last, so it is the first one `pop` expands
+            self.untried = state.ordered_moves(_other(mover))[::-1]
+
+
+class MCTSTree:
+    """
+        Monte Carlo Tree Search (UCT) over the candidate moves of a position.
+
+            Every playout walks down the tree, choosing the child with the highest UCT value
+            (average result plus `EXPLORATION` times the square root of log(parent visits) / child
+            visits), adds one new child there, finishes the game with random moves and credits the
+            result to every node on the path. Children are expanded in static evaluation order and
+            only over `get_candidate_moves`, so large boards are not swamped by cells far from play;
+            the random games themselves may use any empty cell.
+
+            The tree is kept between searches. When the next search starts from a position that
+            follows from the current root by the moves played since (the AI's move and the human's
+            reply), the matching subtree becomes the new root and its playouts count towards the
+            new search. Any other position starts a fresh tree.
+
+            Args:
+                seed (int | None): Seed of the tree's random number generator, for repeatable searches.
+    """
+
+    def __init__(self, seed: int | None = None):
+        self.random = random.Random(seed)
+        self.root = None
+        self.root_board = None
+        self.win_length = None
+
+    def clear(self):
+        self.root = self.root_board = self.win_length = None
+
+    def _set_root(self, board_state: list[str], player_symbol: str, win_length: int, state: GameState):
+        if self.root is not None and win_length == self.win_length and len(board_state) == len(self.root_board):
+            added = {i for i, symbol in enumerate(board_state) if symbol != self.root_board[i]}
+            if all(self.root_board[i] == "-" for i in added):
+                node = self.root
+                while node is not None and added:
+                    mover = _other(node.mover)
+                    node = next((child for child in node.children
+                                 if child.move in added and board_state[child.move] == mover), None)
+                    if node is not None:
+                        added.discard(node.move)
+                if node is not None and _other(node.mover) == player_symbol:
+                    node.parent = None
+                    self.root, self.root_board = node, list(board_state)
+                    return
+
+        self.root = _Node(-1, _other(player_symbol), None, state)
+        self.root_board = list(board_state)
+        self.win_length = win_length
+
+    def search(self, board_state: list[str], player_symbol: str, playouts: int,
+               win_length: int = DEFAULT_WIN_LENGTH, deadline: float | None = None,
+               should_stop: Callable[[], bool] | None = None,
+               stats: SearchStats | None = None) -> dict[int, tuple[int, float]]:
+        """
+            Run `playouts` playouts from the position (fewer if the `perf_counter` `deadline` passes first).
+
+                `should_stop` is checked before every playout and raises `SearchAborted`; the tree
+                stays usable. Every tree node on a playout's path is counted as a node in `stats`,
+                at its ply below the root.
+
+                Returns:
+                    dict[int, tuple[int, float]]: `{move: (visits, value)}` for the root moves,
+                    where `value` is the summed result for `player_symbol`.
+        """
+        state = GameState(list(board_state), win_length)
+        self._set_root(board_state, player_symbol, win_length, state)
+        root = self.root
+
+        for playout in range(playouts):
+            if should_stop is not None and should_stop():
+                raise SearchAborted
+            if deadline is not None and playout and perf_counter() >= deadline:
+                break
+            node = root
+            path = []
+            # Selection
+            while not node.untried and node.children:
+                scale = EXPLORATION * sqrt(log(node.visits))
+                node = max(node.children, key=lambda child: child.value / child.visits
+                           + scale / sqrt(child.visits))
+                state.make_move(node.move, node.mover)
+                path.append(node.move)
+                if stats is not None:
+                    stats.enter_node(len(path) - 1, state.board)
+            # Expansion
+            if node.untried:
+                move = node.untried.pop()
+                mover = _other(node.mover)
+                state.make_move(move, mover)
+                path.append(move)
+                if stats is not None:
+                    stats.expanded_nodes += 1
+                    stats.enter_node(len(path) - 1, state.board)
+                child = _Node(move, mover, node, state)
+                node.children.append(child)
+                node = child
+            # Simulation
+            if node.outcome is not None:
+                winner = node.mover if node.outcome == 1.0 else None
+            else:
+                winner = self._playout(state, _other(node.mover))
+            # Backpropagation
+            while node is not None:
+                node.visits += 1
+                if winner is None:
+                    node.value += 0.5
+                elif winner == node.mover:
+                    node.value += 1.0
+                node = node.parent
+            for move in reversed(path):
+                state.unmake_move(move)
+
+        return {child.move: (child.visits, child.value) for child in root.children}
+
+    def _playout(self, state: GameState, player: str) -> str | None:
+        # Finish the game with uniformly random moves; the board is restored afterwards
+        empty_cells = [i for i, symbol in enumerate(state.board) if symbol == "-"]
+        self.random.shuffle(empty_cells)
+        winner = None
+        played = 0
+        for move in empty_cells:
+            state.make_scratch_move(move, player)
+            played += 1
+            if state.x_wins or state.o_wins:
+                winner = player
+                break
+            player = _other(player)
+        for move in reversed(empty_cells[:played]):
+            state.unmake_scratch_move(move)
+        return winner
+
+
+def _choose_move(root_stats: dict[int, tuple[int, float]], player_symbol: str, difficulty: int,
+                 stats: SearchStats | None) -> int:
+    # Turn root visit counts into a move, in the spirit of `choose_move_with_noise`
+    visited = sorted((move, visits, value) for move, (visits, value) in root_stats.items() if visits)
+    # Scores in percent from X's perspective, so that `choose_move_with_noise` tolerances apply
+    candidates = [(move, 100 * value / visits if player_symbol == "X" else 100 * (1 - value / visits))
+                  for move, visits, value in visited]
+    if difficulty >= DETERMINISTIC_DIFFICULTY:
+        # The most visited move is the most reliable one; ties go to the lower index
+        move = max(visited, key=lambda entry: entry[1])[0]
+    else:
+        move = choose_move_with_noise(candidates, player_symbol, difficulty)
+    if stats is not None:
+        stats.candidates = candidates
+        stats.chosen_move = move
+    return move
+
+
+def compute_best_move_mcts(board_state: list[str], player_symbol: str, difficulty: int,
+                           win_length: int = DEFAULT_WIN_LENGTH, playouts: int | None = None,
+                           time_budget_ms: float | None = None, tree: MCTSTree | None = None,
+                           should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None) -> int:
+    """
+        Compute a move with Monte Carlo Tree Search instead of a full-width search.
+
+        The difficulty sets the playout budget (`get_playout_budget`) and how the move is picked.
+        From `DETERMINISTIC_DIFFICULTY` on, the most visited root move is played. Below it, the
+        root moves are scored by their average playout result in percent, from X's perspective,
+        and `choose_move_with_noise` picks among the ones within its tolerance of the best.
+
+        Args:
+            board_state (list[str]): The current board state. It is not modified.
+            player_symbol (str): The symbol of the player whose turn it is ("X" or "O").
+            difficulty (int): The difficulty level (1-9).
+            win_length (int): The number of marks in a row needed to win.
+            playouts (int | None): Optional playout budget overriding the difficulty's.
+            time_budget_ms (float | None): Optional wall-clock budget; the search stops at whichever
+            budget runs out first. At least one playout is always run.
+            tree (MCTSTree | None): Optional tree to reuse between the moves of a game. A fresh
+            tree is used if none is given.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback, checked before
+            every playout; when it fires, `SearchAborted` is raised.
+            stats (SearchStats | None): Optional search statistics: tree nodes visited, elapsed
+            time, the root candidates and the chosen move.
+
+        Returns:
+            int: The index of the chosen move.
+    """
+    started = perf_counter()
+    if tree is None:
+        tree = MCTSTree()
+    if playouts is None:
+        playouts = get_playout_budget(difficulty)
+    deadline = None if time_budget_ms is None else started + time_budget_ms / 1000
+
+    root_stats = tree.search(board_state, player_symbol, playouts, win_length, deadline, should_stop, stats)
+    move = _choose_move(root_stats, player_symbol, difficulty, stats)
+    if stats is not None:
+        stats.elapsed_seconds += perf_counter() - started
+    return move
+
+
+def _initialize_worker(seed: int | None, worker_counter):
+    global _worker_tree, _worker_reported
+    with worker_counter.get_lock():
+        worker_number = worker_counter.value
+        worker_counter.value += 1
+    _worker_tree = MCTSTree(None if seed is None else seed + worker_number)
+    _worker_reported = (None, {})
+
+
+def _run_playouts(board_state: list[str], player_symbol: str, win_length: int, playouts: int,
+                  deadline_seconds: float | None, call_id: int) -> tuple[dict, SearchStats]:
+    """
+        Grow the worker's own tree inside a pool worker.
+
+            The worker tree persists between calls and is reused across moves. When one worker
+            runs several tasks of the same search (`call_id`), only the playouts added since its
+            previous report are returned, so nothing is counted twice.
+
+            Returns:
+                tuple[dict, SearchStats]: `({move: (visits, value)}, stats)` for this task.
+    """
+    global _worker_reported
+    deadline = None if deadline_seconds is None else perf_counter() + deadline_seconds
+    stats = SearchStats()
+    root_stats = _worker_tree.search(board_state, player_symbol, playouts, win_length, deadline, stats=stats)
+
+    reported_call, reported = _worker_reported
+    _worker_reported = (call_id, root_stats)
+    if reported_call != call_id:
+        return root_stats, stats
+    return {move: (visits - reported.get(move, (0, 0.0))[0], value - reported.get(move, (0, 0.0))[1])
+            for move, (visits, value) in root_stats.items()}, stats
+
+
+class ParallelMCTS:
+    """
+        Monte Carlo Tree Search with the playouts spread across a process pool (root parallelism).
+
+            Every worker grows its own `MCTSTree`, kept between moves, with an equal share of the
+            playout budget and its own random seed. The visit counts and results of the root moves
+            are then summed over the workers and the move is picked as in `compute_best_move_mcts`.
+
+            The pool is started once and reused for every move; use the object as a context
+            manager or call `close()` when done.
+
+            Args:
+                max_workers (int | None): Number of worker processes (default: the CPU count).
+                seed (int | None): Base seed; worker `n` seeds its tree with `seed + n`.
+    """
+
+    def __init__(self, max_workers: int | None = None, seed: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.call_id = 0
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_initialize_worker,
+                                            initargs=(seed, multiprocessing.Value("i", 0)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def compute_best_move(self, board_state: list[str], player_symbol: str, difficulty: int,
+                          win_length: int = DEFAULT_WIN_LENGTH, playouts: int | None = None,
+                          time_budget_ms: float | None = None, stats: SearchStats | None = None) -> int:
+        """
+            Parallel counterpart of `compute_best_move_mcts`, with the same arguments. The
+            statistics of all workers are summed.
+        """
+        started = perf_counter()
+        if playouts is None:
+            playouts = get_playout_budget(difficulty)
+        self.call_id += 1
+        share = -(-playouts // self.max_workers)
+        deadline_seconds = None if time_budget_ms is None else time_budget_ms / 1000
+
+        futures = [self.executor.submit(_run_playouts, board_state, player_symbol, win_length, share,
+                                        deadline_seconds, self.call_id)
+                   for _ in range(self.max_workers)]
+        root_stats = {}
+        for future in futures:
+            worker_stats, worker_search_stats = future.result()
+            for move, (visits, value) in worker_stats.items():
+                total_visits, total_value = root_stats.get(move, (0, 0.0))
+                root_stats[move] = (total_visits + visits, total_value + value)
+            if stats is not None:
+                stats.merge(worker_search_stats)
+
+        move = _choose_move(root_stats, player_symbol, difficulty, stats)
+        if stats is not None:
+            stats.elapsed_seconds += perf_counter() - started
+        return move
@@ -0,0 +1,73 @@
+from game_functions import get_candidate_moves
+from game_state import GameState
+
+KILLER_SLOTS = 2    # Killer moves remembered per ply
+
+
+class MoveOrderer:
+    """
+        Dynamic move ordering for `minimax_search`, learned from the search itself.
+
+            Instead of placing every child and evaluating it (the static `get_ordered_moves`), moves
+            are tried in this order:
+
+            1. The transposition table (principal variation) move of the position, if any.
+            2. Moves that complete a line for the player, then moves that block one of the
+               opponent's, read directly from the `GameState` line counts.
+            3. The killer moves of the ply: the last `KILLER_SLOTS` moves that caused a beta cutoff
+               at the same depth in a sibling position.
+            4. All other candidate moves, by history score: every cutoff adds the square of the
+               remaining depth to the `(player, move)` that caused it. Ties (including every move
+               before anything has been learned) go to the cell on more winning lines, then to
+               the lower index.
+
+            One orderer is meant to be shared by all root moves of a search (and by all iterations
+            of an iterative deepening search), so what is learned carries over. The scores it
+            produces are the same as with static ordering; only the number of nodes changes.
+    """
+
+    def __init__(self):
+        self.killers = []
+        self.history = {}
+
+    def clear(self):
+        self.killers.clear()
+        self.history.clear()
+
+    def order_moves(self, state: GameState, player: str, ply: int, hash_move: int = -1) -> list[int]:
+        moves = get_candidate_moves(state.board)
+        history = self.history
+        cell_lines = state.cell_lines
+        moves.sort(key=lambda move: (history.get((player, move), 0), len(cell_lines[move])), reverse=True)
+
+        if player == "X":
+            own_counts, other_counts = state.x_counts, state.o_counts
+        else:
+            own_counts, other_counts = state.o_counts, state.x_counts
+        threat = state.win_length - 1
+        wins, blocks = [], []
+        for move in moves:
+            lines = cell_lines[move]
+            if any(own_counts[line] == threat and not other_counts[line] for line in lines):
+                wins.append(move)   # A win on any line outranks a block on another
+            elif any(other_counts[line] == threat and not own_counts[line] for line in lines):
+                blocks.append(move)
+
+        first = [hash_move] if hash_move in moves else []
+        first += [move for move in wins + blocks if move != hash_move]
+        if ply < len(self.killers):
+            first += [move for move in self.killers[ply] if move not in first and move in moves]
+        if not first:
+            return moves
+        return first + [move for move in moves if move not in first]
+
+    def record_cutoff(self, player: str, move: int, ply: int, remaining_depth: int):
+        if ply >= len(self.killers):
+            self.killers.extend([] for _ in range(ply + 1 - len(self.killers)))
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+
+        key = (player, move)
+        self.history[key] = self.history.get(key, 0) + remaining_depth * remaining_depth
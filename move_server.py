@@ -0,0 +1,409 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import perf_counter
+
+from algorithm_functions import (choose_move_with_noise, choose_move_with_temperature, compute_budgeted_candidates,
+                                 compute_move_candidates, get_skill_level)
+from game_functions import (DEFAULT_BOARD_SIZE, get_board_size, get_candidate_moves, get_evaluation_tables, get_winner,
+                            has_moves_left)
+from game_state import GameState
+from transposition_table import TranspositionTable
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Board size → (win length, deepest search that stays responsive), as in the GUI's board menu
+BOARD_PRESETS = {3: (3, 8), 4: (4, 8), 5: (4, 6), 7: (5, 3)}
+DEFAULT_CACHE_ENTRIES = 100_000
+PENDING_SEARCHES_PER_WORKER = 2     # Searches queued ahead of each worker before clients are slowed down
+MAX_IN_FLIGHT_PER_CONNECTION = 32   # Requests of one connection being answered at once
+LATENCY_WINDOW = 10_000             # Latencies kept for the percentiles
+PERCENTILES = (50, 90, 99)
+
+# Per-process state of the pool workers
+_worker_table = None
+
+
+def _initialize_worker():
+    global _worker_table
+    _worker_table = TranspositionTable()
+
+
+def _search_candidates(board_state: list[str], player_symbol: str, depth_limit: int, win_length: int,
+                       node_budget: int | None = None) -> list[tuple[int, float]]:
+    # Runs in a pool worker, with a transposition table that persists between requests. Budgeted
+    # searches get a fresh table so that deeper entries do not lift them above their level.
+    if node_budget is not None:
+        return compute_budgeted_candidates(board_state, player_symbol, depth_limit, node_budget,
+                                           use_bitboard=True, win_length=win_length)[0]
+    return compute_move_candidates(board_state, player_symbol, depth_limit, True, _worker_table,
+                                   use_bitboard=True, win_length=win_length)
+
+
+def get_percentiles(latencies) -> dict:
+    """
+        Nearest-rank percentiles (`PERCENTILES`) and the maximum of a collection of latencies.
+    """
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+    summary = {f"p{percentile}": ordered[max(-(-len(ordered) * percentile // 100) - 1, 0)]
+               for percentile in PERCENTILES}
+    summary["max"] = ordered[-1]
+    return summary
+
+
+def parse_request(request: dict) -> tuple[GameState, str, int, int, int]:
+    """
+        Validate a move request.
+
+            A request is a JSON object with `board` (a string or list of "X", "O" and "-" cells, row
+            by row), an optional `symbol` (derived from the number of marks if missing), an optional
+            `difficulty` (1-9, default 9) and an optional `win_length` (default from
+            `BOARD_PRESETS`). The search depth is difficulty - 1, capped per board size as in the GUI.
+
+            Returns:
+                tuple: `(state, player_symbol, difficulty, win_length, depth_limit)`, where `state` is a
+                `GameState` of the board.
+
+            Raises:
+                ValueError: If the request is malformed or the game is already over.
+    """
+    board = request.get("board", "")
+    if not isinstance(board, (str, list)):
+        raise ValueError("board must be a string or a list of cells")
+    board_state = list(board)
+    board_size = get_board_size(board_state)
+    if board_size not in BOARD_PRESETS or len(board_state) != board_size * board_size:
+        raise ValueError(f"board must have {', '.join(str(size * size) for size in BOARD_PRESETS)} cells")
+    if any(cell not in ("X", "O", "-") for cell in board_state):
+        raise ValueError("board cells must be 'X', 'O' or '-'")
+
+    x_count, o_count = board_state.count("X"), board_state.count("O")
+    player_symbol = request.get("symbol", "X" if x_count == o_count else "O")
+    if player_symbol not in ("X", "O"):
+        raise ValueError("symbol must be 'X' or 'O'")
+    difficulty = request.get("difficulty", 9)
+    if not isinstance(difficulty, int) or not 1 <= difficulty <= 9:
+        raise ValueError("difficulty must be an integer from 1 to 9")
+    preset_win_length, depth_cap = BOARD_PRESETS[board_size]
+    win_length = request.get("win_length", preset_win_length)
+    if not isinstance(win_length, int) or not 2 <= win_length <= board_size:
+        raise ValueError(f"win_length must be an integer from 2 to {board_size}")
+    state = GameState(board_state, win_length)
+    if state.is_terminal:
+        raise ValueError("the game is already over")
+
+    return state, player_symbol, difficulty, win_length, min(difficulty - 1, depth_cap)
+
+
+class MoveServer:
+    """
+        Asyncio move server: line-delimited JSON over TCP, searched on a pool of worker processes.
+
+            Every line a client sends is one request (see `parse_request`), answered with one line
+            `{"id", "move", "source", "latency_ms"}` (the request's `id` is echoed), or
+            `{"id", "error"}`. The line `{"command": "stats"}` returns the request counts and latency
+            percentiles instead. Requests of one connection are answered concurrently, so the answers
+            may come back in a different order.
+
+            Positions are reduced by symmetry (`GameState.canonical_hash`). The candidate scores of each
+            canonical position, board size, side to move, depth and win length are kept in one LRU cache shared
+            by all clients (`source` "cache"), and requests for a position whose search is already
+            running wait for that search instead of starting another (`source` "batched"). The
+            cached scores are mapped back onto each request's board and `choose_move_with_noise`
+            runs per request, so lower difficulties still vary and the chosen move is always the
+            one `compute_best_move` would return. Difficulties with a node budget (`SKILL_LEVELS`)
+            are searched and cached per budget and pick their move with the temperature error
+            model, as `compute_best_move_budgeted` does.
+
+            Backpressure: at most `PENDING_SEARCHES_PER_WORKER` searches per worker are queued on the
+            pool, and each connection answers at most `MAX_IN_FLIGHT_PER_CONNECTION` requests at a
+            time. Beyond that the server stops reading from the connection, so an overloaded
+            server slows its clients down through TCP instead of queueing without bound. If a search
+            fails (e.g. a worker process dies), its requests are answered with an error and the pool
+            is replaced.
+
+            Args:
+                max_workers (int | None): Number of engine worker processes (default: the CPU count).
+                cache_entries (int): Size of the shared position cache.
+    """
+
+    def __init__(self, max_workers: int | None = None, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_entries = cache_entries
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.executor = None
+        self.search_slots = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"requests": 0, "errors": 0, "cache": 0, "batched": 0, "search": 0}
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_initialize_worker)
+        self.search_slots = asyncio.Semaphore(self.max_workers * PENDING_SEARCHES_PER_WORKER)
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        return {**self.counts, "cache_entries": len(self.cache), "latency_ms": get_percentiles(self.latencies)}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection_slots = asyncio.Semaphore(MAX_IN_FLIGHT_PER_CONNECTION)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await connection_slots.acquire()    # Stop reading while this connection is saturated
+                line = await reader.readline()
+                if not line:
+                    connection_slots.release()
+                    break
+                task = asyncio.create_task(self._answer(line, writer, write_lock, connection_slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock,
+                      connection_slots: asyncio.Semaphore):
+        started = perf_counter()
+        try:
+            request = {}
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    request = {}
+                    raise ValueError("request must be a JSON object")
+                if request.get("command") == "stats":
+                    response = self.get_stats()
+                else:
+                    response = await self.handle_request(request)
+                    response["latency_ms"] = 1000 * (perf_counter() - started)
+                    self.latencies.append(response["latency_ms"])
+            except Exception as error:
+                # Every request line gets an answer line, whatever went wrong
+                response = {"error": str(error) if isinstance(error, ValueError) else f"internal error: {error!r}"}
+            if "id" in request:
+                response["id"] = request["id"]
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            connection_slots.release()
+
+    async def handle_request(self, request: dict) -> dict:
+        """
+            Answer one move request.
+
+                Returns:
+                    dict: `{"move", "source"}`, or `{"error"}` for an invalid request.
+        """
+        self.counts["requests"] += 1
+        try:
+            state, player_symbol, difficulty, win_length, depth_limit = parse_request(request)
+        except ValueError as error:
+            self.counts["errors"] += 1
+            return {"error": str(error)}
+
+        level = get_skill_level(difficulty)
+        canonical, permutation = state.canonical_hash()
+        # The canonical hash does not encode the board size (the empty board hashes to 0 on every size)
+        key = (canonical, len(state.board), player_symbol, depth_limit, win_length, level.node_budget)
+        canonical_candidates = self.cache.get(key)
+        if canonical_candidates is not None:
+            self.cache.move_to_end(key)
+            source = "cache"
+        else:
+            search = self.in_flight.get(key)
+            source = "batched"
+            if search is None:
+                search = asyncio.ensure_future(self._search(key, state.board, player_symbol, depth_limit,
+                                                            win_length, permutation, level.node_budget))
+                self.in_flight[key] = search
+                source = "search"
+            try:
+                canonical_candidates = await asyncio.shield(search)
+            except Exception as error:
+                self.counts["errors"] += 1
+                return {"error": f"search failed: {error!r}"}
+        self.counts[source] += 1
+
+        candidates = sorted((permutation[index], score) for index, score in canonical_candidates)
+        if level.node_budget is not None:
+            win_score = get_evaluation_tables(len(state.board), win_length)[0]
+            move = choose_move_with_temperature(candidates, player_symbol, level.temperature, win_score)
+        else:
+            move = choose_move_with_noise(candidates, player_symbol, difficulty)
+        return {"move": move, "source": source}
+
+    async def _search(self, key: tuple, board_state: list[str], player_symbol: str, depth_limit: int,
+                      win_length: int, permutation: tuple[int, ...],
+                      node_budget: int | None = None) -> list[tuple[int, float]]:
+        # Score the candidates on a worker and cache them in canonical coordinates
+        try:
+            async with self.search_slots:
+                executor = self.executor
+                try:
+                    candidates = await asyncio.get_running_loop().run_in_executor(
+                        executor, _search_candidates, board_state, player_symbol, depth_limit, win_length,
+                        node_budget)
+                except BrokenProcessPool:
+                    # A worker died: fail the requests waiting on this search, serve later ones from a new pool
+                    if self.executor is executor:
+                        executor.shutdown(wait=False)
+                        self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                            initializer=_initialize_worker)
+                    raise
+            canonical_candidates = [(permutation.index(index), score) for index, score in candidates]
+            self.cache[key] = canonical_candidates
+            if len(self.cache) > self.cache_entries:
+                self.cache.popitem(last=False)
+            return canonical_candidates
+        finally:
+            del self.in_flight[key]
+
+
+def generate_positions(count: int, board_size: int = DEFAULT_BOARD_SIZE, seed: int | None = None,
+                       max_plies: int | None = None) -> list[str]:
+    """
+        Random non-terminal positions for load testing, each reached by random candidate moves.
+
+            Returns:
+                list[str]: Boards as strings, row by row.
+    """
+    rng = random.Random(seed)
+    win_length = BOARD_PRESETS[board_size][0]
+    max_plies = board_size * board_size - 1 if max_plies is None else max_plies
+    positions = []
+    while len(positions) < count:
+        board_state = ["-"] * (board_size * board_size)
+        for ply in range(rng.randint(0, max_plies)):
+            board_state[rng.choice(get_candidate_moves(board_state))] = "X" if ply % 2 == 0 else "O"
+            if get_winner(board_state, win_length) is not None:
+                break
+        if get_winner(board_state, win_length) is None and has_moves_left(board_state):
+            positions.append("".join(board_state))
+    return positions
+
+
+async def run_load(host: str, port: int, positions: list[str], connections: int, requests: int,
+                   difficulty: int, pipeline: int = 1) -> dict:
+    """
+        Load generator: `connections` clients send `requests` move requests in total, drawn in turn
+        from `positions`, each keeping up to `pipeline` requests outstanding.
+
+            Returns:
+                dict: Requests, errors, wall time, throughput and client-side latency percentiles,
+                plus the server's own statistics.
+    """
+    latencies = []
+    errors = 0
+
+    async def client(client_index: int):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        request_ids = range(client_index, requests, connections)
+        sent_at = {}
+        window = asyncio.Semaphore(pipeline)
+
+        async def send_all():
+            for request_id in request_ids:
+                await window.acquire()
+                sent_at[request_id] = perf_counter()
+                request = {"id": request_id, "board": positions[request_id % len(positions)],
+                           "difficulty": difficulty}
+                writer.write(json.dumps(request).encode() + b"\n")
+                await writer.drain()
+
+        sender = asyncio.create_task(send_all())
+        for _ in request_ids:
+            response = json.loads(await reader.readline())
+            latencies.append(1000 * (perf_counter() - sent_at.pop(response["id"])))
+            errors += "error" in response
+            window.release()
+        await sender
+        writer.close()
+
+    started = perf_counter()
+    await asyncio.gather(*(client(index) for index in range(connections)))
+    wall_seconds = perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"command": "stats"}\n')
+    server_stats = json.loads(await reader.readline())
+    writer.close()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": wall_seconds,
+        "requests_per_second": requests / wall_seconds if wall_seconds else 0.0,
+        "latency_ms": get_percentiles(latencies),
+        "server": server_stats,
+    }
+
+
+async def _serve(arguments):
+    server = MoveServer(arguments.workers, arguments.cache_entries)
+    try:
+        listener = await server.start(arguments.host, arguments.port)
+        print(f"Serving moves on {arguments.host}:{arguments.port} with {server.max_workers} workers",
+              file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local move server and its load generator.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    serve = subparsers.add_parser("serve", help="Run the move server.")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--workers", type=int, default=None, help="Engine worker processes (default: CPU count).")
+    serve.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES,
+                       help="Size of the shared position cache.")
+
+    load = subparsers.add_parser("load", help="Send random positions to a running server.")
+    load.add_argument("--host", default=DEFAULT_HOST)
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--connections", type=int, default=8, help="Concurrent client connections.")
+    load.add_argument("--requests", type=int, default=1000, help="Total number of move requests.")
+    load.add_argument("--pipeline", type=int, default=1, help="Outstanding requests per connection.")
+    load.add_argument("--positions", type=int, default=200, help="Number of distinct random positions.")
+    load.add_argument("--board-size", type=int, choices=sorted(BOARD_PRESETS), default=DEFAULT_BOARD_SIZE)
+    load.add_argument("--difficulty", type=int, default=9)
+    load.add_argument("--seed", type=int, default=None, help="Seed for the random positions.")
+    arguments = parser.parse_args()
+
+    if arguments.mode == "serve":
+        try:
+            asyncio.run(_serve(arguments))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    positions = generate_positions(arguments.positions, arguments.board_size, arguments.seed)
+    result = asyncio.run(run_load(arguments.host, arguments.port, positions, arguments.connections,
+                                  arguments.requests, arguments.difficulty, arguments.pipeline))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+from time import perf_counter
+from typing import Callable
+
+from algorithm_functions import choose_move_with_noise
+from game_functions import (BONUS, DEFAULT_WIN_LENGTH, get_candidate_moves, get_evaluation_tables, promote_move,
+                            SearchAborted)
+from game_state import GameState
+from move_ordering import MoveOrderer
+from search_stats import SearchStats
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+ASPIRATION_WINDOW = BONUS   # Half-width of the first window around the previous iteration's score
+NULL_WINDOW = 1             # Evaluation scores are whole numbers, so (alpha, alpha + 1) holds no score
+
+
+def _negamax_state(state: GameState, current_depth: int, color: int, alpha: float, beta: float, depth_limit: int,
+                   transposition_table: TranspositionTable | None, should_stop: Callable[[], bool] | None,
+                   stats: SearchStats | None, move_orderer: MoveOrderer | None = None) -> float:
+    """
+        Negamax search with principal-variation search (PVS) on an incrementally evaluated state.
+
+            Scores are from the perspective of the side to move (`color` is 1 when X moves, -1 when
+            O moves), so a single branch handles both players: the value of a position is the
+            highest negated value of its children. The first (best ordered) child is searched with
+            the full `(alpha, beta)` window; every later child only with a null window
+            `(alpha, alpha + 1)`, which just proves that it is no better than the moves seen so
+            far. A child that fails high on the null window is re-searched with the full window.
+
+            The transposition table is shared with `minimax_search`: entries are stored from X's
+            perspective, so a negamax lower bound for O is stored as an upper bound and vice versa.
+            The search is fail-soft and returns the same values as `minimax_search` (negated for O)
+            whenever the result lies inside the window.
+
+            Returns:
+                float: The score of the position for the side to move.
+    """
+    if should_stop is not None and should_stop():
+        raise SearchAborted
+    if stats is not None:
+        stats.enter_node(current_depth, state.board)
+
+    score = state.evaluate()
+    if (score == state.win_score or score == -state.win_score or current_depth == depth_limit
+            or not state.empty_count):
+        return color * score
+
+    table_key = permutation = None
+    hash_move = -1
+    original_alpha, original_beta = alpha, beta
+    if transposition_table is not None:
+        table_key, permutation = transposition_table.make_state_key(state, color == 1, depth_limit - current_depth)
+        entry = transposition_table.probe(table_key)
+        if entry is not None:
+            flag, value, stored_move = entry
+            value *= color
+            if flag == EXACT:
+                return value
+            if (flag == LOWER_BOUND) == (color == 1):
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+            hash_move = permutation[stored_move]
+
+    if stats is not None:
+        stats.expanded_nodes += 1
+    player = "X" if color == 1 else "O"
+    if move_orderer is None:
+        moves = promote_move(state.ordered_moves(player), hash_move)
+    else:
+        moves = move_orderer.order_moves(state, player, current_depth, hash_move)
+
+    best_score = float("-inf")
+    best_index = -1
+    for n, index in enumerate(moves):
+        state.make_move(index, player)
+        if n == 0:
+            value = -_negamax_state(state, current_depth + 1, -color, -beta, -alpha, depth_limit,
+                                    transposition_table, should_stop, stats, move_orderer)
+        else:
+            value = -_negamax_state(state, current_depth + 1, -color, -alpha - NULL_WINDOW, -alpha, depth_limit,
+                                    transposition_table, should_stop, stats, move_orderer)
+            if alpha < value < beta:    # Better than the principal variation: find its exact score
+                value = -_negamax_state(state, current_depth + 1, -color, -beta, -alpha, depth_limit,
+                                        transposition_table, should_stop, stats, move_orderer)
+        state.unmake_move(index)
+        if value > best_score:
+            best_score, best_index = value, index
+        alpha = max(alpha, best_score)
+        if alpha >= beta:
+            if stats is not None:
+                stats.record_cutoff(current_depth)
+            if move_orderer is not None:
+                move_orderer.record_cutoff(player, index, current_depth, depth_limit - current_depth)
+            break
+
+    if transposition_table is not None:
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND if color == 1 else LOWER_BOUND
+        elif best_score >= original_beta:
+            flag = LOWER_BOUND if color == 1 else UPPER_BOUND
+        else:
+            flag = EXACT
+        transposition_table.store(table_key, flag, color * best_score, permutation.index(best_index))
+
+    return best_score
+
+
+def _aspiration_search(search: Callable[[float, float], float], guess: float | None) -> float:
+    # Exact score within a window around `guess`, widened to infinity on the side that fails
+    if guess is None:
+        return search(float("-inf"), float("inf"))
+    alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+    value = search(alpha, beta)
+    if value <= alpha:
+        value = search(float("-inf"), beta)
+    elif value >= beta:
+        value = search(alpha, float("inf"))
+    return value
+
+
+def _mtdf(search: Callable[[float, float], float], guess: float | None) -> float:
+    # MTD(f): converge on the exact score with null-window searches only, starting from `guess`
+    lower, upper = float("-inf"), float("inf")
+    value = 0 if guess is None else guess
+    while lower < upper:
+        beta = value + NULL_WINDOW if value == lower else value
+        value = search(beta - NULL_WINDOW, beta)
+        if value < beta:
+            upper = value
+        else:
+            lower = value
+    return value
+
+
+def compute_best_move_negamax(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                              transposition_table: TranspositionTable | None = None, use_mtdf: bool = False,
+                              win_length: int = DEFAULT_WIN_LENGTH, time_budget_ms: float | None = None,
+                              should_stop: Callable[[], bool] | None = None, stats: SearchStats | None = None,
+                              move_orderer: MoveOrderer | None = None) -> int:
+    """
+        Compute a move with a negamax principal-variation search, aspiration windows and optionally MTD(f).
+
+        The root is searched with iterative deepening, from depth limit 0 up to `depth_limit`,
+        over one transposition table. In every iteration the best move of the previous one is
+        searched first, with an aspiration window of `ASPIRATION_WINDOW` around its previous score
+        (or, with `use_mtdf`, by MTD(f) starting from that score); a window that fails is widened
+        to infinity on the failing side. The other root moves are then only tested with a null
+        window against the best score so far, in index order, and re-searched exactly when they
+        would take over. Narrow windows cut off far more nodes than the full windows of
+        `compute_best_move`.
+
+        The chosen move is the one `compute_best_move` returns for the same `depth_limit` and
+        `difficulty`: the lowest-index move with the best score, since moves before the current
+        best must only equal it to take over and moves after it must beat it. Below difficulty
+        5 the random pick needs the exact score of every move, so each root move is scored with
+        its own aspiration search (or MTD(f)) instead, giving the same candidates as
+        `compute_move_candidates`.
+
+        Args:
+            board_state (list[str]): The current board state. It is not modified.
+            player_symbol (str): The symbol of the player whose turn it is ("X" or "O").
+            depth_limit (int): The maximum search depth below each root move, as in `compute_best_move`.
+            difficulty (int): The difficulty level (1-9) passed on to `choose_move_with_noise`.
+            transposition_table (TranspositionTable | None): Optional position cache, which can be
+            shared with `compute_best_move`. A fresh table is used if none is given, as the
+            iterations and MTD(f) rely on one.
+            use_mtdf (bool): If True, find exact root scores with MTD(f) instead of aspiration windows.
+            win_length (int): The number of marks in a row needed to win.
+            time_budget_ms (float | None): Optional wall-clock budget, as in
+            `compute_best_move_timed`: when it runs out, the unfinished iteration is discarded
+            and the deepest completed one decides. The depth 0 iteration always completes.
+            should_stop (Callable[[], bool] | None): Optional cancellation callback; when it fires,
+            `SearchAborted` is raised.
+            stats (SearchStats | None): Optional search statistics. `candidates` holds the root
+            moves whose exact score is known: every move below difficulty 5, otherwise only the
+            moves that were the best one at some point of the last completed iteration.
+            move_orderer (MoveOrderer | None): Optional dynamic move ordering, shared by all root
+            moves and iterations.
+
+        Returns:
+            int: The index of the chosen move.
+    """
+    started = perf_counter()
+    deadline = None if time_budget_ms is None else started + time_budget_ms / 1000
+    if transposition_table is None:
+        transposition_table = TranspositionTable()
+
+    deepest = max(min(depth_limit, board_state.count("-") - 1), 0)
+    win_score = get_evaluation_tables(len(board_state), win_length)[0]
+    color = 1 if player_symbol == "X" else -1
+    exact_search = _mtdf if use_mtdf else _aspiration_search
+    all_moves = difficulty < 5
+
+    def out_of_time():
+        return perf_counter() >= deadline or (should_stop is not None and should_stop())
+
+    root_moves = get_candidate_moves(board_state)
+    guesses = {}
+    completed = None
+    completed_depth = -1
+    for depth in range(deepest + 1):
+        stop = out_of_time if deadline is not None and depth > 0 else should_stop
+        state = GameState(list(board_state), win_length)    # An aborted search leaves its moves on the board
+
+        def search_move(index, alpha, beta):
+            # Score of a root move for the player to move, within (alpha, beta)
+            state.make_move(index, player_symbol)
+            value = -_negamax_state(state, 0, -color, -beta, -alpha, depth, transposition_table, stop, stats,
+                                    move_orderer)
+            state.unmake_move(index)
+            return value
+
+        scores = {}
+        try:
+            if all_moves:
+                for i in root_moves:
+                    scores[i] = exact_search(lambda alpha, beta: search_move(i, alpha, beta), guesses.get(i))
+            else:
+                best_index = max(guesses, key=guesses.get) if guesses else root_moves[0]
+                best_score = scores[best_index] = exact_search(lambda alpha, beta: search_move(best_index, alpha, beta),
+                                                               guesses.get(best_index))
+                for i in root_moves:
+                    if i == best_index:
+                        continue
+                    # A lower index only has to equal the best score to take over; a higher one must beat it
+                    bound = best_score - NULL_WINDOW if i < best_index else best_score
+                    if search_move(i, bound, bound + NULL_WINDOW) > bound:
+                        best_index = i
+                        best_score = scores[i] = search_move(i, bound, float("inf"))
+        except SearchAborted:
+            if depth == 0 or (should_stop is not None and should_stop()):
+                raise
+            break
+
+        guesses = scores
+        completed = sorted((i, color * score) for i, score in scores.items())
+        completed_depth = depth
+        if all_moves and all(score == win_score or score == -win_score for score in scores.values()):
+            break
+
+    move = choose_move_with_noise(completed, player_symbol, difficulty)
+    if stats is not None:
+        stats.elapsed_seconds += perf_counter() - started
+        stats.completed_depth = completed_depth
+        stats.candidates = completed
+        stats.chosen_move = move
+    return move
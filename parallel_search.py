@@ -0,0 +1,147 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithm_functions import choose_move_with_noise
+from bitboard_functions import board_to_bitboard, get_bitboard_layout, minimax_search_bitboard
+from game_functions import DEFAULT_WIN_LENGTH, get_board_size, get_candidate_moves
+from transposition_table import TranspositionTable
+
+DETERMINISTIC_DIFFICULTY = 5    # From this level on `choose_move_with_noise` always picks the best score
+
+# Per-process state of the pool workers
+_shared_bound = None
+_worker_table = None
+
+
+def _initialize_worker(shared_bound):
+    global _shared_bound, _worker_table
+    _shared_bound = shared_bound
+    _worker_table = TranspositionTable()
+
+
+def _score_root_move(board_state: list[str], player_symbol: str, index: int, depth_limit: int,
+                     win_length: int, use_shared_bound: bool) -> tuple[int, float, bool]:
+    """
+        Score one root move inside a pool worker.
+
+            With `use_shared_bound`, the search window starts at the best score any worker has
+            finished so far. A move that cannot beat it fails low quickly, and the score returned
+            for it is only an upper bound (lower bound for "O"). Exact scores are published back
+            to the shared bound for the other workers.
+
+            Returns:
+                tuple[int, float, bool]: `(index, score, is_exact)`.
+    """
+    x_bits, o_bits = board_to_bitboard(board_state)
+    if player_symbol == "X":
+        x_bits |= 1 << index
+    else:
+        o_bits |= 1 << index
+    layout = get_bitboard_layout(get_board_size(board_state), win_length)
+
+    alpha, beta = float("-inf"), float("inf")
+    if use_shared_bound:
+        if player_symbol == "X":
+            alpha = _shared_bound.value
+        else:
+            beta = _shared_bound.value
+
+    value = minimax_search_bitboard(x_bits, o_bits, 0, player_symbol == "O", alpha, beta, depth_limit,
+                                    _worker_table, layout)
+    is_exact = alpha < value < beta
+
+    if use_shared_bound and is_exact:
+        with _shared_bound.get_lock():
+            if (value > _shared_bound.value) if player_symbol == "X" else (value < _shared_bound.value):
+                _shared_bound.value = value
+
+    return index, value, is_exact
+
+
+class ParallelRootSearch:
+    """
+        Alpha-beta search with the root moves spread across a process pool.
+
+            Each root move is searched by a pool worker with the bitboard engine and a worker-local
+            transposition table that persists between calls. At deterministic difficulty levels
+            the workers share the best root score found so far through a `multiprocessing.Value`
+            and use it as their search window, so later moves benefit from earlier siblings the
+            way they would in a sequential alpha-beta loop. Lower difficulty levels need an exact
+            score for every move (see `choose_move_with_noise`) and are searched with full windows.
+
+            The pool is started once and reused for every move; use the object as a context
+            manager or call `close()` when done. One instance must not run two searches at once,
+            because they would share the same bound.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.shared_bound = multiprocessing.Value("d", 0.0)
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker,
+                                            initargs=(self.shared_bound,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def compute_move_candidates(self, board_state: list[str], player_symbol: str, depth_limit: int,
+                                difficulty: int, win_length: int = DEFAULT_WIN_LENGTH) -> list[tuple[int, float]]:
+        """
+            Score the root moves in parallel.
+
+                At deterministic difficulty levels the scores of moves that could not beat the
+                shared bound are only bounds. Those moves are re-searched exactly if they might tie
+                with the best move at a lower index, so the move `choose_move_with_noise` picks
+                matches the sequential engine.
+
+                Returns:
+                    list[tuple[int, float]]: `(index, score)` pairs in index order.
+        """
+        use_shared_bound = difficulty >= DETERMINISTIC_DIFFICULTY
+        with self.shared_bound.get_lock():
+            self.shared_bound.value = float("-inf") if player_symbol == "X" else float("inf")
+
+        futures = [self.executor.submit(_score_root_move, board_state, player_symbol, index, depth_limit,
+                                        win_length, use_shared_bound)
+                   for index in get_candidate_moves(board_state)]
+        results = sorted(future.result() for future in futures)
+        if not use_shared_bound:
+            return [(index, value) for index, value, _ in results]
+
+        # The bound always comes from an exact score, so the best exact score is the true best
+        exact_scores = [value for _, value, is_exact in results if is_exact]
+        best = max(exact_scores) if player_symbol == "X" else min(exact_scores)
+        first_best_index = min(index for index, value, is_exact in results if is_exact and value == best)
+        ties = [index for index, value, is_exact in results
+                if not is_exact and value == best and index < first_best_index]
+        rescore_futures = [self.executor.submit(_score_root_move, board_state, player_symbol, index, depth_limit,
+                                                win_length, False)
+                           for index in ties]
+        rescored = {}
+        for future in rescore_futures:
+            index, value, _ = future.result()
+            rescored[index] = value
+        return [(index, rescored.get(index, value)) for index, value, _ in results]
+
+    def compute_best_move(self, board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                          win_length: int = DEFAULT_WIN_LENGTH) -> int:
+        """
+            Parallel counterpart of `compute_best_move`. At difficulty 5 and above the chosen move
+            is always the same as the sequential engine's.
+        """
+        candidates = self.compute_move_candidates(board_state, player_symbol, depth_limit, difficulty, win_length)
+        return choose_move_with_noise(candidates, player_symbol, difficulty)
+
+
+def compute_best_move_parallel(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                               win_length: int = DEFAULT_WIN_LENGTH, max_workers: int | None = None) -> int:
+    """
+        One-off parallel search. Starting a process pool is expensive, so keep a
+        `ParallelRootSearch` around instead when searching more than one move.
+    """
+    with ParallelRootSearch(max_workers) as search:
+        return search.compute_best_move(board_state, player_symbol, depth_limit, difficulty, win_length)
@@ -0,0 +1,91 @@
+import threading
+from typing import Callable
+
+from game_functions import DEFAULT_WIN_LENGTH, SearchAborted, get_ordered_moves
+from game_state import GameState
+from search_stats import SearchStats
+
+PONDER_REPLIES = 4  # Human replies searched ahead, most likely first
+
+
+class Ponderer:
+    """
+        Search the AI's answers to the likely human replies while the human is thinking.
+
+            `start` takes the AI's search and the position after the AI's move and, on a background
+            thread, plays each of the human's `PONDER_REPLIES` most likely replies (by
+            `get_ordered_moves`, the engine's own static ordering) and runs the search on the
+            resulting position. The search runs on that thread, so it must not touch Tk. The answers are
+            kept by the position's Zobrist hash, so when the human plays one of the predicted moves,
+            `take` returns the AI's move without searching. Even on a miss, the positions searched
+            while pondering stay in the shared transposition table.
+
+            `stop` cancels the pondering through the search's `should_stop` callback without waiting;
+            the thread returns at the next node it visits. It is safe to call on the Tk thread. Since
+            the transposition table and tree are not thread-safe, anything else that searches with
+            them must first call `wait` (off the Tk thread) to let a stopped thread finish; a new
+            pondering thread does this itself.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self, search: Callable[[list[str], str, Callable[[], bool], SearchStats], int],
+              board_state: list[str], human_symbol: str, ai_symbol: str, win_length: int = DEFAULT_WIN_LENGTH,
+              replies: int = PONDER_REPLIES):
+        """
+            Start pondering on `board_state`, the position after the AI's move.
+
+                Args:
+                    search (Callable): The AI's search, called as `search(board_state, player_symbol,
+                    should_stop, stats)` and returning the chosen move. It may raise `SearchAborted`.
+        """
+        self.stop()
+        previous = self.thread
+        self.results = {}
+        self.cancel_event = threading.Event()
+        state = GameState(list(board_state), win_length)
+        predicted = get_ordered_moves(state.board, human_symbol, win_length)[:replies]
+        self.thread = threading.Thread(target=self._ponder,
+                                       args=(search, state, human_symbol, ai_symbol, predicted, self.cancel_event,
+                                             self.results, previous),
+                                       daemon=True)
+        self.thread.start()
+
+    def _ponder(self, search, state, human_symbol, ai_symbol, predicted, cancel_event, results, previous):
+        # Runs on the pondering thread
+        if previous is not None:
+            previous.join()     # A stopped thread may still be inside its last node
+        for reply in predicted:
+            if cancel_event.is_set():
+                return
+            state.make_move(reply, human_symbol)
+            if not state.is_terminal:
+                stats = SearchStats()
+                try:
+                    move = search(list(state.board), ai_symbol, cancel_event.is_set, stats)
+                except SearchAborted:
+                    return
+                results[state.zobrist_hash] = (move, stats)
+            state.undo_move()
+
+    def stop(self):
+        self.cancel_event.set()
+
+    def wait(self):
+        """
+            Wait until the pondering thread has returned. Call `stop` first, and never on the Tk
+            thread: the search may still be running.
+        """
+        thread = self.thread
+        if thread is not None:
+            thread.join()
+
+    def take(self, state: GameState) -> tuple[int, SearchStats] | None:
+        """
+            The pondered `(move, stats)` for a position, or None if it was not predicted (or not
+            finished).
+        """
+        return self.results.get(state.zobrist_hash)
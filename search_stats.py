@@ -0,0 +1,105 @@
+from typing import Callable
+
+
+class SearchStats:
+    """
+        Counters and results collected while a search runs.
+
+            Pass one instance as the `stats` argument of a search function. Every node the search
+            visits is counted in `nodes` and per ply in `nodes_by_ply`; alpha-beta searches also
+            count the nodes whose remaining moves were pruned, in `cutoffs` and `cutoffs_by_ply`.
+            Ply 0 is the position right after a root move. The root functions (`compute_best_move`
+            and friends) add the elapsed time, the `(index, score)` candidates fed into
+            `choose_move_with_noise` and the chosen move.
+
+            The same instance can be reused across several searches to accumulate totals, or reset
+            with `clear()`.
+
+            Args:
+                profile_hook (Callable[[int, object], None] | None): Optional callback invoked on
+                every node with the ply and the position: the board list for the list engine (it
+                is modified after the call, so copy it to keep it) or an `(x_bits, o_bits)` tuple
+                for the bitboard engine.
+    """
+
+    def __init__(self, profile_hook: Callable[[int, object], None] | None = None):
+        self.profile_hook = profile_hook
+        self.clear()
+
+    def clear(self):
+        self.nodes = 0
+        self.expanded_nodes = 0
+        self.cutoffs = 0
+        self.nodes_by_ply = []
+        self.cutoffs_by_ply = []
+        self.elapsed_seconds = 0.0
+        self.completed_depth = -1
+        self.candidates = []
+        self.chosen_move = -1
+
+    def enter_node(self, ply: int, position):
+        self.nodes += 1
+        if ply >= len(self.nodes_by_ply):
+            self.nodes_by_ply.extend([0] * (ply + 1 - len(self.nodes_by_ply)))
+        self.nodes_by_ply[ply] += 1
+        if self.profile_hook is not None:
+            self.profile_hook(ply, position)
+
+    def record_cutoff(self, ply: int):
+        self.cutoffs += 1
+        if ply >= len(self.cutoffs_by_ply):
+            self.cutoffs_by_ply.extend([0] * (ply + 1 - len(self.cutoffs_by_ply)))
+        self.cutoffs_by_ply[ply] += 1
+
+    def merge(self, other: "SearchStats"):
+        """Add the node and cutoff counts of another search, e.g. one run in a worker process."""
+        self.nodes += other.nodes
+        self.expanded_nodes += other.expanded_nodes
+        self.cutoffs += other.cutoffs
+        for counts, other_counts in ((self.nodes_by_ply, other.nodes_by_ply),
+                                     (self.cutoffs_by_ply, other.cutoffs_by_ply)):
+            counts.extend([0] * (len(other_counts) - len(counts)))
+            for ply, count in enumerate(other_counts):
+                counts[ply] += count
+
+    @property
+    def depth_reached(self) -> int:
+        """The number of plies looked ahead, counting the root move."""
+        return len(self.nodes_by_ply)
+
+    @property
+    def branching_factor(self) -> float:
+        """The average number of children searched per expanded node, after pruning."""
+        if not self.expanded_nodes:
+            return 0.0
+        return (self.nodes - self.nodes_by_ply[0]) / self.expanded_nodes
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "depth_reached": self.depth_reached,
+            "completed_depth": self.completed_depth,
+            "cutoffs": self.cutoffs,
+            "cutoffs_by_ply": list(self.cutoffs_by_ply),
+            "branching_factor": self.branching_factor,
+            "elapsed_seconds": self.elapsed_seconds,
+            "candidates": [list(candidate) for candidate in self.candidates],
+            "chosen_move": self.chosen_move,
+        }
+
+    def format_summary(self) -> str:
+        """A short multi-line summary, as shown in the GUI's debug overlay."""
+        candidates = ", ".join(f"{index}: {score:g}" for index, score in self.candidates)
+        return "\n".join((
+            f"Nodes: {self.nodes:,} in {self.elapsed_seconds * 1000:.1f} ms ({self.nodes_per_second:,.0f}/s)",
+            f"Depth reached: {self.depth_reached}"
+            + (f" (completed {self.completed_depth})" if self.completed_depth >= 0 else ""),
+            f"Branching factor: {self.branching_factor:.2f}",
+            f"Cutoffs by ply: {self.cutoffs_by_ply or '-'}",
+            f"Candidates: {candidates or '-'}",
+            f"Chosen move: {self.chosen_move}",
+        ))
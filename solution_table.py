@@ -0,0 +1,228 @@
+import argparse
+import os
+import struct
+from typing import Callable
+
+from algorithm_functions import choose_move_with_noise, compute_best_move, compute_move_candidates
+from bitboard_functions import (BOARD_CELLS, EMPTY_CELLS, FULL_MASK, WINNING_MASKS, bitboard_to_board,
+                                board_to_bitboard, canonical_bitboard_key)
+from game_functions import DEFAULT_WIN_LENGTH
+from search_stats import SearchStats
+from transposition_table import TranspositionTable, get_board_symmetries
+
+SOLUTION_TABLE_FILENAME = "solution_table.bin"
+SOLUTION_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), SOLUTION_TABLE_FILENAME)
+
+FILE_MAGIC = b"XOST"
+FILE_VERSION = 1
+DEPTH_COUNT = 9   # Difficulty 1-9 ⇒ depth limit 0-8
+
+_HEADER = struct.Struct("<4sBBI")
+_KEY = struct.Struct("<I")
+
+
+def enumerate_reachable_positions() -> list[int]:
+    """
+        Enumerate every non-terminal position reachable from the empty board, reduced by symmetry.
+
+            X always moves first, so the side to move follows from the number of marks. Positions
+            that are already won or full are skipped, since there is no move to look up for them.
+
+            Returns:
+                list[int]: Sorted canonical bitboard keys (`x_bits | o_bits << 9`).
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        key, _ = canonical_bitboard_key(x_bits, o_bits)
+        if key in seen:
+            continue
+        if WINNING_MASKS[x_bits] or WINNING_MASKS[o_bits] or (x_bits | o_bits) == FULL_MASK:
+            continue
+        seen.add(key)
+        x_to_move = x_bits.bit_count() == o_bits.bit_count()
+        for index in EMPTY_CELLS[FULL_MASK & ~(x_bits | o_bits)]:
+            if x_to_move:
+                stack.append((x_bits | 1 << index, o_bits))
+            else:
+                stack.append((x_bits, o_bits | 1 << index))
+
+    return sorted(seen)
+
+
+def solve_positions(positions: list[int]) -> dict[int, tuple[tuple[int, ...], ...]]:
+    """
+        Score every move of every position at every depth limit exposed by the GUI.
+
+            The scores are exactly those `compute_best_move` would feed into `choose_move_with_noise`,
+            stored per depth limit and in the canonical board's cell order.
+
+            Args:
+                positions (list[int]): Canonical bitboard keys, as returned by
+                `enumerate_reachable_positions`.
+
+            Returns:
+                dict[int, tuple[tuple[int, ...], ...]]: For each key, one tuple of move scores per
+                depth limit (0 to `DEPTH_COUNT - 1`).
+    """
+    transposition_table = TranspositionTable()
+    solutions = {}
+    for key in positions:
+        x_bits, o_bits = key & FULL_MASK, key >> BOARD_CELLS
+        board_state = bitboard_to_board(x_bits, o_bits)
+        player_symbol = "X" if x_bits.bit_count() == o_bits.bit_count() else "O"
+        scores_by_depth = []
+        for depth_limit in range(DEPTH_COUNT):
+            candidates = compute_move_candidates(board_state, player_symbol, depth_limit, True,
+                                                 transposition_table, use_bitboard=True)
+            scores = []
+            for _, score in candidates:
+                if score != int(score):
+                    raise ValueError(f"Score {score} cannot be stored exactly; the table only holds integers")
+                scores.append(int(score))
+            scores_by_depth.append(tuple(scores))
+        solutions[key] = tuple(scores_by_depth)
+
+    return solutions
+
+
+def write_solution_table(solutions: dict[int, tuple[tuple[int, ...], ...]], path: str = SOLUTION_TABLE_PATH):
+    """
+        Write solved positions to a compact binary file.
+
+            Layout: a header (magic, version, depth count, position count) followed by one record
+            per position: the canonical key as uint32, then an int16 score for every empty cell at
+            every depth limit. The number of scores per depth follows from the key itself.
+    """
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(FILE_MAGIC, FILE_VERSION, DEPTH_COUNT, len(solutions)))
+        for key in sorted(solutions):
+            file.write(_KEY.pack(key))
+            for scores in solutions[key]:
+                file.write(struct.pack(f"<{len(scores)}h", *scores))
+
+
+class SolutionTable:
+    """
+        In-memory view of a precomputed solution table.
+
+            Positions are stored once per symmetry class, so a lookup canonicalizes the board,
+            probes a dictionary and maps the stored scores back onto the real board's cells.
+    """
+
+    def __init__(self, solutions: dict[int, tuple[tuple[int, ...], ...]], depth_count: int = DEPTH_COUNT):
+        self.solutions = solutions
+        self.depth_count = depth_count
+
+    def __len__(self):
+        return len(self.solutions)
+
+    def lookup_candidates(self, board_state: list[str], player_symbol: str,
+                          depth_limit: int) -> list[tuple[int, int]] | None:
+        """
+            Return the `(index, score)` candidates `compute_move_candidates` would produce.
+
+                Args:
+                    board_state (list[str]): The current board state.
+                    player_symbol (str): The symbol of the player to move ("X" or "O").
+                    depth_limit (int): The search depth limit the candidates should reflect.
+
+                Returns:
+                    list[tuple[int, int]] | None: The candidates in board index order, or None if
+                    the position is not in the table (wrong board size, unreachable position,
+                    wrong side to move or negative depth).
+        """
+        if len(board_state) != BOARD_CELLS or depth_limit < 0:
+            return None
+        x_bits, o_bits = board_to_bitboard(board_state)
+        if (player_symbol == "X") != (x_bits.bit_count() == o_bits.bit_count()):
+            return None
+        key, symmetry = canonical_bitboard_key(x_bits, o_bits)
+        scores_by_depth = self.solutions.get(key)
+        if scores_by_depth is None:
+            return None
+
+        # Any depth limit past the stored range reaches every terminal position, like the last one
+        scores = scores_by_depth[min(depth_limit, self.depth_count - 1)]
+        permutation = get_board_symmetries(3)[symmetry]
+        canonical_empty = EMPTY_CELLS[FULL_MASK & ~(key & FULL_MASK | key >> BOARD_CELLS)]
+        return sorted((permutation[index], score) for index, score in zip(canonical_empty, scores))
+
+
+def load_solution_table(path: str = SOLUTION_TABLE_PATH) -> SolutionTable | None:
+    """
+        Load a solution table written by `write_solution_table`.
+
+            Returns:
+                SolutionTable | None: The loaded table, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, depth_count, position_count = _HEADER.unpack_from(data, 0)
+    if magic != FILE_MAGIC or version != FILE_VERSION:
+        raise ValueError(f"{path} is not a version {FILE_VERSION} solution table")
+
+    offset = _HEADER.size
+    solutions = {}
+    for _ in range(position_count):
+        (key,) = _KEY.unpack_from(data, offset)
+        offset += _KEY.size
+        move_count = BOARD_CELLS - (key & FULL_MASK | key >> BOARD_CELLS).bit_count()
+        depth_format = struct.Struct(f"<{move_count}h")
+        scores_by_depth = []
+        for _ in range(depth_count):
+            scores_by_depth.append(depth_format.unpack_from(data, offset))
+            offset += depth_format.size
+        solutions[key] = tuple(scores_by_depth)
+
+    return SolutionTable(solutions, depth_count)
+
+
+def compute_best_move_from_table(board_state: list[str], player_symbol: str, depth_limit: int, difficulty: int,
+                                 solution_table: SolutionTable, stats: SearchStats | None = None,
+                                 win_length: int = DEFAULT_WIN_LENGTH,
+                                 should_stop: Callable[[], bool] | None = None) -> int:
+    """
+        Choose a move from the precomputed solution table, falling back to a search if needed.
+
+            Produces the same candidates as `compute_best_move` and passes them through
+            `choose_move_with_noise`, so difficulty behaves identically; only the tree search is
+            replaced by a dictionary probe. Positions missing from the table, and every position
+            when `win_length` is not the table's 3 in a row, are searched with `compute_best_move`,
+            which honours `should_stop` (raising `SearchAborted`). `stats`, if given, records the
+            candidates and the chosen move (and no nodes unless the fallback search runs).
+
+            Returns:
+                int: The index of the chosen move.
+    """
+    candidates = None
+    if win_length == DEFAULT_WIN_LENGTH:
+        candidates = solution_table.lookup_candidates(board_state, player_symbol, depth_limit)
+    if candidates is None:
+        return compute_best_move(board_state, player_symbol, depth_limit, difficulty, use_bitboard=True,
+                                 win_length=win_length, should_stop=should_stop, stats=stats)
+
+    move = choose_move_with_noise(candidates, player_symbol, difficulty)
+    if stats is not None:
+        stats.candidates = candidates
+        stats.chosen_move = move
+    return move
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve every reachable 3×3 position and write the solution table.")
+    parser.add_argument("--output", default=SOLUTION_TABLE_PATH, help="Path of the table file to write.")
+    arguments = parser.parse_args()
+
+    positions = enumerate_reachable_positions()
+    write_solution_table(solve_positions(positions), arguments.output)
+    print(f"Wrote {len(positions)} positions to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_MAX_ENTRIES = 250_000
+
+
+@lru_cache(maxsize=None)
+def get_board_symmetries(board_size: int = 3) -> tuple[tuple[int, ...], ...]:
+    """
+        Generate the 8 rotations/reflections of a square board as index permutations.
+
+            Each permutation `p` maps a transformed board back onto the original one, i.e. the
+            transformed board is `[board_state[p[i]] for i in range(len(board_state))]`. The identity
+            permutation is always first. The result is cached per board size.
+
+            Args:
+                board_size (int): The side length of the square board (3 for classic Tic-Tac-Toe).
+
+            Returns:
+                tuple[tuple[int, ...], ...]: The 8 distinct index permutations of the board.
+    """
+    def index_of(row, column):
+        return row * board_size + column
+
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, board_size - 1 - r),
+        lambda r, c: (board_size - 1 - r, board_size - 1 - c),
+        lambda r, c: (board_size - 1 - c, r),
+        lambda r, c: (r, board_size - 1 - c),
+        lambda r, c: (board_size - 1 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (board_size - 1 - c, board_size - 1 - r),
+    )
+    return tuple(
+        tuple(index_of(*transform(index // board_size, index % board_size)) for index in range(board_size ** 2))
+        for transform in transforms
+    )
+
+
+def canonical_board_key(board_state: list[str]) -> tuple[str, tuple[int, ...]]:
+    """
+        Reduce a board to the canonical representative of its symmetry class.
+
+            All 8 rotations/reflections of the board are written out as strings and the
+            lexicographically smallest one is used as the key, so every symmetric variant of a
+            position shares a single transposition table entry.
+
+            Args:
+                board_state (list[str]): The current game board as a list of "X", "O" and "-" cells.
+
+            Returns:
+                tuple[str, tuple[int, ...]]: The canonical board string and the permutation that
+                produced it. `permutation[canonical_index]` is the matching index on `board_state`,
+                which is how stored best moves are translated back onto the real board.
+    """
+    board_size = int(len(board_state) ** 0.5)
+    best_key = None
+    best_permutation = None
+    for permutation in get_board_symmetries(board_size):
+        key = "".join([board_state[i] for i in permutation])
+        if best_key is None or key < best_key:
+            best_key = key
+            best_permutation = permutation
+
+    return best_key, best_permutation
+
+
+class TranspositionTable:
+    """
+        A bounded, least-recently-used cache of search results keyed on canonical board positions.
+
+            Entries are stored under `(canonical board, number of cells, side to move, remaining
+            depth, win length)` and hold a bound flag (`EXACT`, `LOWER_BOUND` or `UPPER_BOUND`), the
+            score and the best move found (in canonical coordinates). The number of cells keeps
+            boards of different sizes apart when one table serves several (as in the move server). The remaining depth is clamped to the number of empty cells,
+            because any search at least that deep reaches every terminal position and therefore
+            returns the same score; this is what lets entries carry over between moves of one game.
+            When the table is full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(board_state: list[str], is_maximizing: bool, remaining_depth: int, win_length: int = 3):
+        """
+            Build the lookup key for a position.
+
+                Returns:
+                    tuple: `(key, permutation)` where `key` is the table key and `permutation` maps
+                    canonical indices back onto `board_state`.
+        """
+        canonical, permutation = canonical_board_key(board_state)
+        remaining_depth = min(remaining_depth, canonical.count("-"))
+        return (canonical, len(board_state), is_maximizing, remaining_depth, win_length), permutation
+
+    @staticmethod
+    def make_state_key(state, is_maximizing: bool, remaining_depth: int):
+        """
+            Build the lookup key for a `GameState`, like `make_key` but from the state's symmetry-reduced
+            Zobrist hash (`GameState.canonical_hash`), so the board is not rescanned.
+
+                Returns:
+                    tuple: `(key, permutation)`, as in `make_key`.
+        """
+        canonical, permutation = state.canonical_hash()
+        # The hash does not encode the board size (the empty board hashes to 0 on every size)
+        return ((canonical, len(state.board), is_maximizing, min(remaining_depth, state.empty_count),
+                 state.win_length), permutation)
+
+    def probe(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, key, flag: int, value: float, best_move: int = -1):
+        self.entries[key] = (flag, value, best_move)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)